@@ -11,16 +11,30 @@
 # ///
 
 import logging
+import mmap
+import os
 import re
 import sys
 import tomllib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 
 import yaml
 
 DOCKERFILES = ["./Dockerfile"]
 PRECOMMIT_CONFIG = ".pre-commit-config.yaml"
 PYPROJECT_PATH = "./pyproject.toml"
+WORKFLOWS_DIR = ".github/workflows"
+# Use the libyaml bindings when available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+UV_VERSION_PATTERN = re.compile(rb"(?m)^\s*UV_VERSION:\s*[\"']?v?([^\s\"']+)")
+PRECOMMIT_REPOS = {
+    "https://github.com/astral-sh/uv-pre-commit": "uv",
+    "https://github.com/charliermarsh/ruff-pre-commit": "ruff",
+}
+# Nesting level of the repo mappings: root mapping > "repos" sequence > repo mapping
+PRECOMMIT_REPO_DEPTH = 3
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -30,54 +44,93 @@ stream_handler.setFormatter(log_formatter)
 logger.addHandler(stream_handler)
 
 
+class DepEntry(NamedTuple):
+    file: str
+    version: str
+
+
+def iter_precommit_revs(stream):
+    # Stream the YAML events to yield (repo, rev) pairs without building the document tree
+    depth = 0
+    key = repo = rev = None
+    for event in yaml.parse(stream, Loader=YAML_LOADER):
+        if isinstance(event, yaml.CollectionStartEvent):
+            depth += 1
+            # A nested collection is the value of the current key
+            if depth == PRECOMMIT_REPO_DEPTH + 1:
+                key = None
+        elif isinstance(event, yaml.CollectionEndEvent):
+            if depth == PRECOMMIT_REPO_DEPTH and repo is not None:
+                yield repo, rev
+                repo = rev = None
+            depth -= 1
+        elif depth == PRECOMMIT_REPO_DEPTH and isinstance(event, yaml.NodeEvent):
+            # Scalars alternate between keys and values within the repo mapping
+            if key is None:
+                key = getattr(event, "value", None)
+                continue
+            if key == "repo":
+                repo = event.value
+            elif key == "rev":
+                rev = event.value
+            key = None
+
+
+def list_workflows() -> list[str]:
+    with os.scandir(WORKFLOWS_DIR) as it:
+        return sorted(
+            entry.path for entry in it if entry.name.endswith(".yml") and entry.is_file(follow_symlinks=False)
+        )
+
+
+def scan_workflow(workflow_file: str) -> DepEntry | None:
+    # Only the env value is needed, so scan the mapped bytes rather than parsing the whole YAML
+    with open(workflow_file, "rb") as f:  # noqa: PTH123
+        # mmap can't map empty files
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            match = UV_VERSION_PATTERN.search(mm)
+            return DepEntry(workflow_file, match.group(1).decode()) if match else None
+
+
 def main():
     # Retrieve & parse all deps files
-    deps_dict = {"uv": [], "ruff": [], "ty": []}
+    deps_dict: dict[str, list[DepEntry]] = {"uv": [], "ruff": [], "ty": []}
     # Parse dockerfiles
     for dockerfile in DOCKERFILES:
         dockerfile_content_ = Path(dockerfile).read_text(encoding="utf-8")
         uv_version = re.search(r"ghcr\.io/astral-sh/uv:(\d+\.\d+\.\d+)", dockerfile_content_).group(1)  # ty: ignore[possibly-unbound-attribute]
-        deps_dict["uv"].append({"file": dockerfile, "version": uv_version})
+        deps_dict["uv"].append(DepEntry(dockerfile, uv_version))
     # Parse precommit
     with Path(PRECOMMIT_CONFIG).open("r", encoding="utf-8") as f:
-        precommit = yaml.safe_load(f)
-    for repo in precommit["repos"]:
-        if repo["repo"] == "https://github.com/astral-sh/uv-pre-commit":
-            deps_dict["uv"].append({"file": PRECOMMIT_CONFIG, "version": repo["rev"].lstrip("v")})
-        elif repo["repo"] == "https://github.com/charliermarsh/ruff-pre-commit":
-            deps_dict["ruff"].append({"file": PRECOMMIT_CONFIG, "version": repo["rev"].lstrip("v")})
+        for repo, rev in iter_precommit_revs(f):
+            if repo in PRECOMMIT_REPOS:
+                deps_dict[PRECOMMIT_REPOS[repo]].append(DepEntry(PRECOMMIT_CONFIG, rev.lstrip("v")))
     # Parse pyproject.toml
     with Path(PYPROJECT_PATH).open("rb") as f:
         pyproject = tomllib.load(f)
 
     for dep in pyproject["project"]["optional-dependencies"]["quality"]:
-        if dep.startswith("ruff"):
-            deps_dict["ruff"].append({"file": PYPROJECT_PATH, "version": dep.split("==")[1]})
-        elif dep.startswith("ty"):
-            deps_dict["ty"] = [{"file": PYPROJECT_PATH, "version": dep.split("==")[1]}]
+        # Exact name match to avoid catching packages like "types-*"
+        name, _, version = dep.partition("==")
+        if name in {"ruff", "ty"}:
+            deps_dict[name].append(DepEntry(PYPROJECT_PATH, version))
 
     # Parse github/workflows/...
-    for workflow_file in Path(".github/workflows").glob("*.yml"):
-        with workflow_file.open("r") as f:
-            workflow = yaml.safe_load(f)
-            if "env" in workflow and "UV_VERSION" in workflow["env"]:
-                deps_dict["uv"].append({
-                    "file": str(workflow_file),
-                    "version": workflow["env"]["UV_VERSION"].lstrip("v"),
-                })
+    with ThreadPoolExecutor() as executor:
+        deps_dict["uv"].extend(entry for entry in executor.map(scan_workflow, list_workflows()) if entry is not None)
 
     # Assert all deps are in sync
     troubles = []
     for dep, versions in deps_dict.items():
-        versions_ = {v["version"] for v in versions}
+        versions_ = {v.version for v in versions}
         if len(versions_) != 1:
             inv_dict = {v: set() for v in versions_}
             for version in versions:
-                inv_dict[version["version"]].add(version["file"])
-            troubles.extend([
-                f"{dep}:",
-                "\n".join(f"- '{v}': {', '.join(files)}" for v, files in inv_dict.items()),
-            ])
+                inv_dict[version.version].add(version.file)
+            troubles.append(f"{dep}:")
+            troubles.extend(f"- '{v}': {', '.join(sorted(files))}" for v, files in inv_dict.items())
 
     if len(troubles) > 0:
         raise AssertionError("Some dependencies are out of sync:\n\n" + "\n".join(troubles))
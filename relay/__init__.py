@@ -1,3 +1,7 @@
-from importlib.metadata import version
+def __getattr__(name: str) -> str:
+    # Resolved on access: importing importlib.metadata dominates the startup time of the CLI
+    if name == "__version__":
+        from importlib.metadata import version  # noqa: PLC0415
 
-__version__ = version("relaycli")
+        return version("relaycli")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
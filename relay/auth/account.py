@@ -5,14 +5,27 @@
 
 """Account management operations."""
 
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from imaplib import IMAP4
 from pathlib import Path
 
+from ..exceptions import RelayError
 from ..models.account import Account, AccountCreate, AccountInfo
 from ..providers.imap import IMAPClient
+from .cache import MessageCache
+from .imap_pool import IMAPPool
 from .storage import AccountStorage
 
 __all__ = ["AccountManager"]
 
+# Maximum number of accounts tested concurrently
+MAX_TEST_WORKERS = 8
+
+# Authenticated IMAP sessions reused for the lifetime of the process, logged out on exit
+_IMAP_POOL = IMAPPool()
+atexit.register(_IMAP_POOL.close_all)
+
 
 class AccountManager:
     """High-level account management operations."""
@@ -34,10 +47,7 @@ class AccountManager:
         Returns:
             Created account
         """
-        # Validate account data using Pydantic v2
-        account_data = AccountCreate.model_validate(account_data.model_dump())
-
-        # Test connection before saving
+        # Test connection before saving (the account data was validated when the model was built)
         test_connection(
             account_data.email,
             account_data.password,
@@ -56,6 +66,7 @@ class AccountManager:
             name: Account name
         """
         self.storage.remove_account(name)
+        MessageCache(self.storage.config_dir).clear(name)
 
     def list_accounts(self) -> list[AccountInfo]:
         """List all accounts without sensitive data.
@@ -76,6 +87,14 @@ class AccountManager:
         """
         return self.storage.get_account(name)
 
+    def get_default_account(self) -> Account | None:
+        """Get the account used when none is specified.
+
+        Returns:
+            First configured account, or None if no account is configured
+        """
+        return self.storage.get_default_account()
+
     def test_account(self, name: str) -> bool:
         """Test connection to an existing account.
 
@@ -90,6 +109,34 @@ class AccountManager:
 
         return test_connection(account.email, password, account.imap_server, account.imap_port, account.provider)
 
+    def test_all_accounts(self, names: list[str] | None = None) -> dict[str, bool | Exception]:
+        """Test connections to several accounts concurrently.
+
+        Args:
+            names: Account names (defaults to all accounts)
+
+        Returns:
+            Dictionary mapping account names to True if connection successful, or to the raised error otherwise
+        """
+        accounts = self.storage.get_accounts_with_passwords(names)
+        if not accounts:
+            return {}
+
+        def _test(account_and_password: tuple[Account, str]) -> bool | Exception:
+            account, password = account_and_password
+            # A failing account must not prevent testing the others, including socket-level failures
+            # (refused connection, timeout, TLS or protocol error) that IMAPClient doesn't convert
+            try:
+                return test_connection(
+                    account.email, password, account.imap_server, account.imap_port, account.provider
+                )
+            except (RelayError, OSError, IMAP4.error) as e:
+                return e
+
+        # Logins are network-bound, so they can overlap
+        with ThreadPoolExecutor(max_workers=min(MAX_TEST_WORKERS, len(accounts))) as executor:
+            return dict(zip(accounts, executor.map(_test, accounts.values()), strict=True))
+
     def account_exists(self, name: str) -> bool:
         """Check if an account exists.
 
@@ -102,7 +149,7 @@ class AccountManager:
         return self.storage.account_exists(name)
 
     def get_imap_client(self, name: str) -> IMAPClient:
-        """Get an IMAP client for an account.
+        """Get an IMAP client for an account, reusing a live session when possible.
 
         Args:
             name: Account name
@@ -111,14 +158,15 @@ class AccountManager:
             Configured IMAP client
         """
         account = self.storage.get_account(name)
-        password = self.storage.get_account_password(name)
-
-        return IMAPClient(
-            imap_server=account.imap_server,
-            email_address=account.email,
-            password=password,
-            imap_port=account.imap_port,
-            provider=account.provider,
+        return _IMAP_POOL.get(
+            (account.imap_server, account.email),
+            lambda: IMAPClient(
+                imap_server=account.imap_server,
+                email_address=account.email,
+                password=self.storage.credential_manager.decrypt_password(account.encrypted_password),
+                imap_port=account.imap_port,
+                provider=account.provider,
+            ),
         )
 
 
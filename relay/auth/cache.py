@@ -0,0 +1,180 @@
+# Copyright (C) 2025, Relay.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
+
+"""Local encrypted cache of message data."""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Any
+
+from ..exceptions import StorageError
+from ..models.message import MessageSummary
+from .credentials import CredentialManager
+
+__all__ = ["MessageCache"]
+
+# Maximum number of summaries kept per account, the most recent UIDs are kept
+MAX_CACHED_SUMMARIES = 1000
+# Maximum number of full messages kept per account, the most recent UIDs are kept
+MAX_CACHED_MESSAGES = 100
+# Maximum age of cached data in seconds, older entries are discarded when read
+MAX_CACHE_AGE = 7 * 24 * 3600
+
+
+class MessageCache:
+    """Caches message summaries and full messages locally, per account, under <config_dir>/cache.
+
+    The content of a given UID never changes as long as the UIDVALIDITY of the folder stays the same,
+    so cached entries are discarded when the server reports a different UIDVALIDITY, or once they are
+    older than MAX_CACHE_AGE. Like the passwords, the cached data is encrypted with the local key.
+    """
+
+    def __init__(self, config_dir: Path | None = None) -> None:
+        """Initialize the message cache.
+
+        Args:
+            config_dir: Directory to store the cache in (defaults to ~/.relay)
+        """
+        if config_dir is None:
+            config_dir = Path.home() / ".relay"
+
+        self.cache_dir = config_dir / "cache"
+        self.credential_manager = CredentialManager(config_dir)
+
+    def _cache_file(self, account: str) -> Path:
+        return self.cache_dir / f"{account}.enc"
+
+    def _messages_dir(self, account: str) -> Path:
+        return self.cache_dir / account
+
+    def _message_file(self, account: str, uid: str) -> Path | None:
+        # UIDs are numbers: anything else, e.g. "../x" from the command line, must not become a path
+        if not (uid.isascii() and uid.isdigit()):
+            return None
+        return self._messages_dir(account) / f"{uid}.enc"
+
+    def _read(self, file: Path) -> dict[str, Any] | None:
+        try:
+            data = json.loads(self.credential_manager.decrypt_data(file.read_bytes(), ttl=MAX_CACHE_AGE))
+        except FileNotFoundError:
+            return None
+        except StorageError:
+            # Expired, or encrypted with a previous key
+            if file.resolve().is_relative_to(self.cache_dir.resolve()):
+                file.unlink(missing_ok=True)
+            return None
+        except (OSError, ValueError):
+            # Corrupted cache
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _write(self, file: Path, data: dict[str, Any]) -> None:
+        try:
+            content = self.credential_manager.encrypt_data(json.dumps(data).encode("utf-8"))
+        except StorageError:
+            # The cache is an optimization: failing to write it must not fail the command
+            return
+        _write_atomic(file, content)
+
+    def load(self, account: str, uid_validity: str) -> dict[str, MessageSummary]:
+        """Load the cached summaries of an account.
+
+        Args:
+            account: Account name
+            uid_validity: Current UIDVALIDITY of the folder
+
+        Returns:
+            Dictionary mapping UIDs to their summary, empty if the cache is missing or outdated
+        """
+        data = self._read(self._cache_file(account))
+        if data is None or not uid_validity or data.get("uid_validity") != uid_validity:
+            return {}
+        return {uid: MessageSummary.model_validate(summary) for uid, summary in data.get("summaries", {}).items()}
+
+    def save(self, account: str, uid_validity: str, summaries: dict[str, MessageSummary]) -> None:
+        """Save the summaries of an account, replacing the previous cache.
+
+        Args:
+            account: Account name
+            uid_validity: Current UIDVALIDITY of the folder
+            summaries: Dictionary mapping UIDs to their summary
+        """
+        if not uid_validity:
+            return
+        uids = sorted(summaries, key=int)[-MAX_CACHED_SUMMARIES:]
+        self._write(
+            self._cache_file(account),
+            {"uid_validity": uid_validity, "summaries": {uid: summaries[uid].model_dump() for uid in uids}},
+        )
+
+    def load_message(self, account: str, uid_validity: str, uid: str) -> dict[str, Any] | None:
+        """Load a cached message.
+
+        Args:
+            account: Account name
+            uid_validity: Current UIDVALIDITY of the folder
+            uid: Email UID
+
+        Returns:
+            Dictionary of email message, None if it isn't cached or the cache is outdated
+        """
+        file = self._message_file(account, uid)
+        data = None if file is None else self._read(file)
+        if data is None or not uid_validity or data.get("uid_validity") != uid_validity:
+            return None
+        return data.get("message")
+
+    def save_message(self, account: str, uid_validity: str, message: dict[str, Any]) -> None:
+        """Save a full message, evicting the oldest UIDs beyond the cache capacity.
+
+        Args:
+            account: Account name
+            uid_validity: Current UIDVALIDITY of the folder
+            message: Dictionary of email message, as returned by `IMAPClient.fetch_message`
+        """
+        file = self._message_file(account, message["uid"])
+        if not uid_validity or file is None:
+            return
+        self._write(file, {"uid_validity": uid_validity, "message": message})
+        messages_dir = self._messages_dir(account)
+        cached_files = sorted(
+            (file for file in messages_dir.glob("*.enc") if file.stem.isdigit()), key=lambda file: int(file.stem)
+        )
+        for file in cached_files[:-MAX_CACHED_MESSAGES]:
+            file.unlink(missing_ok=True)
+
+    def discard_message(self, account: str, uid: str) -> None:
+        """Remove a cached message, e.g. once it was moved out of the folder.
+
+        Args:
+            account: Account name
+            uid: Email UID
+        """
+        file = self._message_file(account, uid)
+        if file is not None:
+            file.unlink(missing_ok=True)
+
+    def clear(self, account: str) -> None:
+        """Remove the cached data of an account.
+
+        Args:
+            account: Account name
+        """
+        self._cache_file(account).unlink(missing_ok=True)
+        shutil.rmtree(self._messages_dir(account), ignore_errors=True)
+
+
+def _write_atomic(file: Path, content: bytes) -> None:
+    try:
+        file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # Write to a temporary file first so that concurrent readers never see a partial cache
+        tmp_file = file.with_suffix(".tmp")
+        tmp_file.write_bytes(content)
+        tmp_file.chmod(0o600)
+        tmp_file.replace(file)
+    except OSError:
+        # The cache is an optimization: failing to write it must not fail the command
+        return
@@ -5,6 +5,7 @@
 
 """Credential encryption utilities using Fernet."""
 
+from functools import lru_cache
 from pathlib import Path
 
 from cryptography.fernet import Fernet, InvalidToken
@@ -25,7 +26,6 @@ class CredentialManager:
         """
         self.config_dir = config_dir
         self.key_file = config_dir / "key"
-        self._fernet: Fernet | None = None
 
     def _ensure_key_exists(self) -> None:
         """Ensure encryption key exists, create if missing."""
@@ -41,14 +41,17 @@ class CredentialManager:
             self.key_file.chmod(0o600)  # Owner read/write only
 
     def _get_fernet(self) -> Fernet:
-        if self._fernet is None:
-            self._ensure_key_exists()
+        try:
             try:
-                key = self.key_file.read_bytes()
-                self._fernet = Fernet(key)
-            except (OSError, ValueError) as e:
-                raise StorageError(f"Failed to load encryption key: {e}")
-        return self._fernet
+                mtime_ns = self.key_file.stat().st_mtime_ns
+            except FileNotFoundError:
+                # First use: generate the key
+                self._ensure_key_exists()
+                mtime_ns = self.key_file.stat().st_mtime_ns
+            # Shared by all the managers of the process, and reloaded if the key file changes
+            return _load_fernet(str(self.key_file), mtime_ns)
+        except (OSError, ValueError) as e:
+            raise StorageError(f"Failed to load encryption key: {e}")
 
     def encrypt_password(self, password: str) -> bytes:
         """Encrypt a password.
@@ -80,6 +83,51 @@ class CredentialManager:
         except (InvalidToken, UnicodeDecodeError, ValueError) as e:
             raise StorageError(f"Failed to decrypt password: {e}")
 
+    def decrypt_passwords(self, encrypted_passwords: list[bytes]) -> list[str]:
+        """Decrypt several passwords, loading the key only once.
+
+        Args:
+            encrypted_passwords: Encrypted password bytes
+
+        Returns:
+            Plain text passwords, in the same order
+        """
+        fernet = self._get_fernet()
+        try:
+            return [fernet.decrypt(token).decode("utf-8") for token in encrypted_passwords]
+        except (InvalidToken, UnicodeDecodeError, ValueError) as e:
+            raise StorageError(f"Failed to decrypt password: {e}")
+
+    def encrypt_data(self, data: bytes) -> bytes:
+        """Encrypt arbitrary data, e.g. cached messages.
+
+        Args:
+            data: Plain data
+
+        Returns:
+            Encrypted data
+        """
+        return self._get_fernet().encrypt(data)
+
+    def decrypt_data(self, token: bytes, ttl: int | None = None) -> bytes:
+        """Decrypt data encrypted with `encrypt_data`.
+
+        Args:
+            token: Encrypted data
+            ttl: Maximum age of the data in seconds (defaults to no limit)
+
+        Returns:
+            Plain data
+
+        Raises:
+            StorageError: If the data can't be decrypted or is older than the TTL
+        """
+        fernet = self._get_fernet()
+        try:
+            return fernet.decrypt(token, ttl=ttl)
+        except InvalidToken as e:
+            raise StorageError(f"Failed to decrypt data: {e}")
+
     def is_initialized(self) -> bool:
         """Check if encryption is initialized.
 
@@ -95,4 +143,10 @@ class CredentialManager:
         """
         if self.key_file.exists():
             self.key_file.unlink()
-        self._fernet = None
+        _load_fernet.cache_clear()
+
+
+@lru_cache(maxsize=8)
+def _load_fernet(key_path: str, mtime_ns: int) -> Fernet:  # noqa: ARG001
+    # The modification time is only part of the cache key
+    return Fernet(Path(key_path).read_bytes())
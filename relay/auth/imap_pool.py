@@ -0,0 +1,82 @@
+# Copyright (C) 2025, Relay.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
+
+"""Pool of authenticated IMAP sessions."""
+
+import threading
+import time
+from collections.abc import Callable
+from contextlib import suppress
+from imaplib import IMAP4
+
+from ..providers.imap import IMAPClient
+
+__all__ = ["IMAPPool"]
+
+# Servers may log out sessions idle for 30 minutes (RFC 3501), so stop reusing them slightly before
+IDLE_TIMEOUT = 25 * 60
+
+
+class IMAPPool:
+    """Pool of authenticated IMAP clients, keyed by (server, email).
+
+    The pool itself can be used from several threads, but imaplib sessions are not thread-safe:
+    a pooled client must only be used by one thread at a time.
+    """
+
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT) -> None:
+        """Initialize the pool.
+
+        Args:
+            idle_timeout: Number of seconds after which an unused session is not reused
+        """
+        self.idle_timeout = idle_timeout
+        # Only guards the dictionary: network calls happen outside of it, so a slow server doesn't block other keys
+        self._lock = threading.Lock()
+        self._clients: dict[tuple[str, str], tuple[IMAPClient, float]] = {}
+
+    def get(self, key: tuple[str, str], connect: Callable[[], IMAPClient]) -> IMAPClient:
+        """Get a live client for a key, connecting a new one if needed.
+
+        Args:
+            key: Server and email address of the account
+            connect: Function creating an authenticated client
+
+        Returns:
+            IMAP client
+        """
+        # Taken out of the pool while it is probed, so that no other thread sends commands on it meanwhile
+        with self._lock:
+            entry = self._clients.pop(key, None)
+        if entry is not None:
+            client, last_used = entry
+            if time.monotonic() - last_used < self.idle_timeout and client.is_alive():
+                return self._keep(key, client)
+            _logout(client)
+        return self._keep(key, connect())
+
+    def _keep(self, key: tuple[str, str], client: IMAPClient) -> IMAPClient:
+        with self._lock:
+            entry = self._clients.get(key)
+            # Another thread may have pooled a client for the same key meanwhile: the first one is kept
+            pooled = client if entry is None else entry[0]
+            self._clients[key] = (pooled, time.monotonic())
+        if pooled is not client:
+            _logout(client)
+        return pooled
+
+    def close_all(self) -> None:
+        """Log out all the pooled sessions."""
+        with self._lock:
+            clients = [client for client, _ in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            _logout(client)
+
+
+def _logout(client: IMAPClient) -> None:
+    # The session may already be closed by the server
+    with suppress(IMAP4.error, OSError):
+        client.logout()
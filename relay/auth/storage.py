@@ -6,15 +6,21 @@
 """Local storage management for account data."""
 
 import base64
+import hashlib
 import json
+import os
 from pathlib import Path
 
 from ..exceptions import AccountExistsError, AccountNotFoundError, StorageError
 from ..models.account import Account, AccountCreate, AccountInfo
+from ..models.base import EmailProvider
 from .credentials import CredentialManager
 
 __all__ = ["AccountStorage"]
 
+# Version byte and high timestamp bits of Fernet tokens, once base64-encoded
+FERNET_TOKEN_PREFIX = b"gAAA"
+
 
 class AccountStorage:
     """Manages local storage of account data."""
@@ -32,11 +38,27 @@ class AccountStorage:
         self.config_dir = config_dir
         self.accounts_file = config_dir / "accounts.json"
         self.credential_manager = CredentialManager(config_dir)
+        # Parsed accounts file, along with the (mtime, size) it was read at
+        self._accounts_cache: tuple[tuple[int, int], dict[str, dict]] | None = None
+        # Digest of the last written content, along with the (mtime, size) of the file it produced
+        self._last_write: tuple[tuple[int, int], bytes] | None = None
 
     def _ensure_config_dir(self) -> None:
         """Ensure configuration directory exists."""
         self.config_dir.mkdir(parents=True, exist_ok=True)
 
+    def _accounts_file_version(self) -> tuple[int, int] | None:
+        """Get the version of the accounts file.
+
+        Returns:
+            Modification time and size of the file, or None if it doesn't exist
+        """
+        try:
+            stat = self.accounts_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def _load_accounts_data(self) -> dict[str, dict]:
         """Load accounts data from file.
 
@@ -46,22 +68,31 @@ class AccountStorage:
         Raises:
             StorageError: If failed to load accounts data
         """
-        if not self.accounts_file.exists():
-            return {}
-
         try:
-            with self.accounts_file.open("r") as f:
-                data = json.load(f)
-
-            # Decode base64 encrypted passwords
+            with self.accounts_file.open("rb") as f:
+                stat = os.fstat(f.fileno())
+                file_version = (stat.st_mtime_ns, stat.st_size)
+                # Reuse the parsed data as long as the file is unchanged
+                if self._accounts_cache is not None and self._accounts_cache[0] == file_version:
+                    return dict(self._accounts_cache[1])
+                data = json.loads(f.read())
+
+            # Encrypted passwords are stored as Fernet tokens, which are already ASCII
             for account_data in data.values():
                 if "encrypted_password" in account_data:
-                    account_data["encrypted_password"] = base64.b64decode(account_data["encrypted_password"])
+                    token = account_data["encrypted_password"].encode("ascii")
+                    # Files written by older versions wrap the token in another layer of base64
+                    if not token.startswith(FERNET_TOKEN_PREFIX):
+                        token = base64.b64decode(token)
+                    account_data["encrypted_password"] = token
 
+        except FileNotFoundError:
+            return {}
         except (OSError, json.JSONDecodeError, ValueError) as e:
             raise StorageError(f"Failed to load accounts data: {e}")
         else:
-            return data
+            self._accounts_cache = (file_version, data)
+            return dict(data)
 
     def _save_accounts_data(self, data: dict[str, dict]) -> None:
         """Save accounts data to file.
@@ -75,24 +106,29 @@ class AccountStorage:
         try:
             self._ensure_config_dir()
 
-            # Encode encrypted passwords as base64 for JSON serialization
-            json_data = {}
-            for name, account_data in data.items():
-                json_data[name] = account_data.copy()
-                if "encrypted_password" in json_data[name]:
-                    json_data[name]["encrypted_password"] = base64.b64encode(
-                        json_data[name]["encrypted_password"]
-                    ).decode("utf-8")
-
-            with self.accounts_file.open("w") as f:
-                json.dump(json_data, f, indent=2)
+            # Fernet tokens are URL-safe base64, so they can be stored as is
+            content = json.dumps(data, indent=2, default=_encode_token).encode("utf-8")
+            digest = hashlib.blake2b(content).digest()
+            # Skip the rewrite if the file still holds exactly this content
+            if self._last_write is not None and self._last_write == (self._accounts_file_version(), digest):
+                return
 
+            # Write to a temporary file first so that the accounts file is never left partially written
+            tmp_file = self.accounts_file.with_suffix(".tmp")
+            tmp_file.write_bytes(content)
             # Secure permissions
-            self.accounts_file.chmod(0o600)
+            tmp_file.chmod(0o600)
+            stat = tmp_file.stat()
+            tmp_file.replace(self.accounts_file)
 
         except (OSError, ValueError) as e:
             raise StorageError(f"Failed to save accounts data: {e}")
 
+        file_version = (stat.st_mtime_ns, stat.st_size)
+        self._last_write = (file_version, digest)
+        # The written data is already decoded, so the next load doesn't need to parse the file again
+        self._accounts_cache = (file_version, dict(data))
+
     def add_account(self, account_data: AccountCreate) -> Account:
         """Add a new account.
 
@@ -148,6 +184,16 @@ class AccountStorage:
 
         return Account.model_validate(accounts[name])
 
+    def get_default_account(self) -> Account | None:
+        """Get the first configured account.
+
+        Returns:
+            Account data, or None if no account is configured
+        """
+        accounts = self._load_accounts_data()
+        account_data = next(iter(accounts.values()), None)
+        return None if account_data is None else Account.model_validate(account_data)
+
     def list_accounts(self) -> list[AccountInfo]:
         """List all accounts without sensitive data.
 
@@ -161,7 +207,9 @@ class AccountStorage:
         for account_data in accounts.values():
             # Remove sensitive data
             safe_data = {k: v for k, v in account_data.items() if k != "encrypted_password"}
-            result.append(AccountInfo.model_validate(safe_data))
+            # Validated when the account was added, only the provider needs converting back from its stored value
+            safe_data["provider"] = EmailProvider(safe_data["provider"])
+            result.append(AccountInfo.model_construct(**safe_data))
 
         return result
 
@@ -206,6 +254,35 @@ class AccountStorage:
         account = self.get_account(name)
         return self.credential_manager.decrypt_password(account.encrypted_password)
 
+    def get_accounts_with_passwords(self, names: list[str] | None = None) -> dict[str, tuple[Account, str]]:
+        """Get accounts along with their decrypted password, reading the storage only once.
+
+        Args:
+            names: Account names (defaults to all accounts)
+
+        Returns:
+            Dictionary mapping account names to their data and decrypted password
+
+        Raises:
+            AccountNotFoundError: If one of the accounts doesn't exist
+        """
+        accounts = self._load_accounts_data()
+        if names is None:
+            names = list(accounts)
+
+        selected_accounts = []
+        for name in names:
+            if name not in accounts:
+                raise AccountNotFoundError(f"Account '{name}' not found")
+            selected_accounts.append(Account.model_validate(accounts[name]))
+        passwords = self.credential_manager.decrypt_passwords([
+            account.encrypted_password for account in selected_accounts
+        ])
+
+        return {
+            account.name: (account, password) for account, password in zip(selected_accounts, passwords, strict=True)
+        }
+
     def reset_storage(self) -> None:
         """Reset all storage data.
 
@@ -214,3 +291,10 @@ class AccountStorage:
         if self.accounts_file.exists():
             self.accounts_file.unlink()
         self.credential_manager.reset()
+
+
+def _encode_token(value: object) -> str:
+    # Called by the JSON encoder for values it can't serialize, i.e. the encrypted passwords
+    if isinstance(value, bytes):
+        return value.decode("ascii")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
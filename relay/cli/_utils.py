@@ -4,12 +4,19 @@
 # See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
 
 
+import functools
 import re
+from collections.abc import Callable
+from typing import Any
 
+import typer
+from rich.console import Console
 from rich.table import Table
 from typer.core import TyperGroup
 
-__all__ = ["AliasGroup", "create_accounts_table", "create_messages_table", "create_table"]
+from relay.exceptions import AccountNotFoundError, RelayError
+
+__all__ = ["AliasGroup", "create_accounts_table", "create_messages_table", "create_table", "handle_cli_errors"]
 
 
 # cf. https://github.com/fastapi/typer/issues/132
@@ -17,17 +24,55 @@ class AliasGroup(TyperGroup):
     """Typer class to allow aliases for commands."""
 
     _CMD_SPLIT_P = re.compile(r" ?[,|] ?")
+    # Alias -> registered command name, built on first lookup since commands are static
+    _alias_map: dict[str, str] | None = None
 
     def get_command(self, ctx, cmd_name):
         cmd_name = self._group_cmd_name(cmd_name)
         return super().get_command(ctx, cmd_name)
 
     def _group_cmd_name(self, default_name):
-        for cmd in self.commands.values():
-            name = cmd.name
-            if name and default_name in self._CMD_SPLIT_P.split(name):
-                return name
-        return default_name
+        if self._alias_map is None:
+            self._alias_map = {
+                alias: cmd.name
+                for cmd in self.commands.values()
+                if cmd.name
+                for alias in self._CMD_SPLIT_P.split(cmd.name)
+            }
+        return self._alias_map.get(default_name, default_name)
+
+
+# --- Error Handling Utilities ---
+
+# Follow-up suggestions displayed after specific errors
+ERROR_HINTS: dict[type[RelayError], str] = {
+    AccountNotFoundError: "Use 'relay accounts ls' to see available accounts",
+}
+
+
+def handle_cli_errors(console: Console, unexpected_label: str = "Unexpected error") -> Callable[[Callable], Callable]:
+    """Create a command decorator that reports errors on the console and exits with status 1."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except typer.Exit:
+                raise
+            except RelayError as e:
+                console.print(f"[red]✗ {e}[/red]")
+                if (hint := ERROR_HINTS.get(type(e))) is not None:
+                    console.print(f"[dim]{hint}[/dim]")
+                raise typer.Exit(1)
+            except Exception as e:
+                # Errors not raised by Relay itself, e.g. "Unexpected error: ..."
+                console.print(f"[red]✗ {unexpected_label}: {e}[/red]")
+                raise typer.Exit(1)
+
+        return wrapper
+
+    return decorator
 
 
 # --- Table Creation Utilities ---
@@ -38,23 +83,34 @@ def create_table(title: str) -> Table:
     return Table(title=title)
 
 
+# Column headers and options of the standard tables
+MESSAGES_TABLE_COLUMNS: tuple[tuple[str, dict[str, Any]], ...] = (
+    ("UID", {"style": "cyan", "no_wrap": True}),
+    ("Timestamp", {"style": "blue", "no_wrap": True, "width": 24}),
+    ("From", {"style": "green", "no_wrap": True}),
+    ("Subject", {"style": "bold", "max_width": 30}),
+    ("Snippet", {"style": "dim", "max_width": 25}),
+)
+ACCOUNTS_TABLE_COLUMNS: tuple[tuple[str, dict[str, Any]], ...] = (
+    ("Name", {"style": "cyan"}),
+    ("Email", {"style": "magenta"}),
+    ("Provider", {"style": "green"}),
+    ("Server", {"style": "blue"}),
+    ("Port", {"style": "yellow"}),
+)
+
+
 def create_messages_table(title: str) -> Table:
     """Create a standardized messages table."""
     table = Table(title=title)
-    table.add_column("UID", style="cyan", no_wrap=True)
-    table.add_column("Timestamp", style="blue", no_wrap=True, width=24)
-    table.add_column("From", style="green", no_wrap=True)
-    table.add_column("Subject", style="bold", max_width=30)
-    table.add_column("Snippet", style="dim", max_width=25)
+    for header, options in MESSAGES_TABLE_COLUMNS:
+        table.add_column(header, **options)
     return table
 
 
 def create_accounts_table(title: str = "Configured Accounts") -> Table:
     """Create a standardized accounts table."""
     table = Table(title=title)
-    table.add_column("Name", style="cyan")
-    table.add_column("Email", style="magenta")
-    table.add_column("Provider", style="green")
-    table.add_column("Server", style="blue")
-    table.add_column("Port", style="yellow")
+    for header, options in ACCOUNTS_TABLE_COLUMNS:
+        table.add_column(header, **options)
     return table
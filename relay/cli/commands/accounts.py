@@ -6,80 +6,60 @@
 """Account management CLI commands."""
 
 import functools
-from collections.abc import Callable
-from typing import Annotated
+import hmac
+from getpass import getpass
+from typing import TYPE_CHECKING, Annotated
 
-import questionary
 import typer
 from rich.console import Console
-from rich.prompt import Prompt
 
-from relay.auth.account import AccountManager
-from relay.exceptions import (
-    AccountExistsError,
-    AccountNotFoundError,
-    AuthenticationError,
-    ServerConnectionError,
-    ValidationError,
-)
-from relay.models.account import AccountCreate, EmailProvider
-from relay.providers.utils import EMAIL_TO_PROVIDER, PROVIDER_INFO
+from relay.models.base import EmailProvider
+from relay.providers.utils import PROVIDER_INFO, resolve_provider
 
-from .._utils import AliasGroup, create_accounts_table
+if TYPE_CHECKING:
+    from relay.auth.account import AccountManager
+
+from .._utils import AliasGroup, create_accounts_table, handle_cli_errors
 
 console = Console()
 app = typer.Typer(help="Account management commands", cls=AliasGroup)
 
-
-# --- Helper Functions for DRY Code ---
+_handle_account_errors = handle_cli_errors(console)
 
 
-def _handle_account_errors(func: Callable) -> Callable:
-    """Decorate function to handle common account management errors."""
-
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except AccountExistsError as e:
-            console.print(f"[red]✗ {e}[/red]")
-            raise typer.Exit(1)
-        except AccountNotFoundError as e:
-            console.print(f"[red]✗ {e}[/red]")
-            raise typer.Exit(1)
-        except AuthenticationError as e:
-            console.print(f"[red]✗ {e}[/red]")
-            raise typer.Exit(1)
-        except ServerConnectionError as e:
-            console.print(f"[red]✗ {e}[/red]")
-            raise typer.Exit(1)
-        except ValidationError as e:
-            console.print(f"[red]✗ {e}[/red]")
-            raise typer.Exit(1)
-        except Exception as e:
-            console.print(f"[red]✗ Unexpected error: {e}[/red]")
-            raise typer.Exit(1)
-
-    return wrapper
+# --- Helper Functions for DRY Code ---
 
 
-def _get_account_manager() -> AccountManager:
+@functools.cache
+def _get_account_manager() -> "AccountManager":
     """Get account manager instance."""
+    # Deferred: pulls in pydantic models and the IMAP stack
+    from relay.auth.account import AccountManager
+
     return AccountManager()
 
 
-def _get_provider_choice() -> EmailProvider:
-    """Get provider choice from user via questionary dropdown."""
-    provider_choices = [
+@functools.cache
+def _get_provider_choices() -> list:
+    """Build the questionary provider choices once."""
+    import questionary
+
+    return [
         questionary.Choice("Gmail", EmailProvider.GMAIL),
         questionary.Choice("Outlook (Hotmail/Live)", EmailProvider.OUTLOOK),
         questionary.Choice("Yahoo Mail", EmailProvider.YAHOO),
         questionary.Choice("iCloud Mail", EmailProvider.ICLOUD),
         questionary.Choice("Custom IMAP Server", EmailProvider.CUSTOM),
     ]
+
+
+def _get_provider_choice() -> EmailProvider:
+    """Get provider choice from user via questionary dropdown."""
+    import questionary
+
     provider_choice = questionary.select(
         "Select your email provider:",
-        choices=provider_choices,
+        choices=_get_provider_choices(),
         default=EmailProvider.CUSTOM,
     ).ask()
 
@@ -105,6 +85,11 @@ def connect_account(
     imap_port: Annotated[int | None, typer.Option("--imap-port", help="IMAP port for custom providers")] = None,
 ) -> None:
     """Add a new IMAP account with interactive setup."""
+    from pydantic import ValidationError as PydanticValidationError
+    from rich.prompt import Prompt
+
+    from relay.models.account import AccountCreate
+
     console.print("[bold blue]Setting up new IMAP account[/bold blue]")
 
     # Get account name
@@ -116,49 +101,54 @@ def connect_account(
     # Auto-detect provider or ask for custom
     final_provider = provider
     if not final_provider:
-        email_domain = email.rpartition("@")[-1].lower()
-        final_provider = EMAIL_TO_PROVIDER.get(email_domain)
+        final_provider = resolve_provider(email)
         if final_provider is None:
-            console.print(f"[yellow]Unknown provider for domain: {email_domain}[/yellow]")
+            console.print(f"[yellow]Unknown provider for domain: {email.rpartition('@')[-1].lower()}[/yellow]")
             final_provider = _get_provider_choice()
 
-    # Get server settings
+    # Get server settings (custom providers have no IMAP defaults)
+    imap_info = PROVIDER_INFO[final_provider].get("imap")
     final_imap_server = imap_server
     if imap_server is None:
-        if final_provider in PROVIDER_INFO:
-            final_imap_server = PROVIDER_INFO[final_provider]["imap"]["server"]
+        if imap_info is not None:
+            final_imap_server = imap_info["server"]
             console.print(f"[green]Using {final_provider.value} settings for IMAP server: {final_imap_server}[/green]")
         else:
             final_imap_server = Prompt.ask("IMAP server", default="imap.gmail.com")
 
     final_imap_port = imap_port
     if imap_port is None:
-        if final_provider in PROVIDER_INFO:
-            final_imap_port = PROVIDER_INFO[final_provider]["imap"]["port"]
+        if imap_info is not None:
+            final_imap_port = imap_info["port"]
             console.print(f"[green]Using {final_provider.value} settings for IMAP port: {final_imap_port}[/green]")
         else:
             final_imap_port = int(Prompt.ask("IMAP port", default="993"))
 
     # Get password
-    password = Prompt.ask("Password", password=True)
+    password = getpass("Password: ")
 
     # Confirm password
-    password_confirm = Prompt.ask("Confirm password", password=True)
+    password_confirm = getpass("Confirm password: ")
 
-    if password != password_confirm:
+    if not hmac.compare_digest(password.encode("utf-8"), password_confirm.encode("utf-8")):
         console.print("[red]Passwords do not match[/red]")
         raise typer.Exit(1)
 
-    # Create and add account
-    account_data = AccountCreate(
-        name=name,
-        email=email,
-        provider=final_provider,
-        imap_server=final_imap_server,
-        imap_port=final_imap_port,
-        password=password,
-    )
+    # Validate before connecting so that malformed input never reaches the TLS handshake
+    try:
+        account_data = AccountCreate(
+            name=name,
+            email=email,
+            provider=final_provider,
+            imap_server=final_imap_server,
+            imap_port=final_imap_port,
+            password=password,
+        )
+    except PydanticValidationError as e:
+        console.print(f"[red]✗ Invalid account details: {e.errors()[0]['msg']}[/red]")
+        raise typer.Exit(1)
 
+    # Create and add account
     with console.status("[bold green]Testing connection...", spinner="dots"):
         manager = _get_account_manager()
         account = manager.add_account(account_data)
@@ -208,12 +198,33 @@ def remove_account_connection(
 
 @app.command("test")
 @_handle_account_errors
-def test_account_connection(name: str) -> None:
+def test_account_connection(
+    name: Annotated[str, typer.Argument(help="Account name")] = "",
+    all_accounts: Annotated[bool, typer.Option("--all", help="Test all the accounts")] = False,
+) -> None:
     """Test connection to an account."""
     manager = _get_account_manager()
-    with console.status(f"[bold green]Testing connection to '{name}'...", spinner="dots"):
-        manager.test_account(name)
-    console.print(f"[green]✓ Connection to '{name}' successful[/green]")
+    if not all_accounts:
+        if not name:
+            console.print("[red]✗ Specify an account name or use --all[/red]")
+            raise typer.Exit(1)
+        with console.status(f"[bold green]Testing connection to '{name}'...", spinner="dots"):
+            manager.test_account(name)
+        console.print(f"[green]✓ Connection to '{name}' successful[/green]")
+        return
+
+    with console.status("[bold green]Testing connections to all accounts...", spinner="dots"):
+        results = manager.test_all_accounts()
+    if not results:
+        console.print("[yellow]No accounts configured[/yellow]")
+        return
+    for account_name, result in results.items():
+        if result is True:
+            console.print(f"[green]✓ Connection to '{account_name}' successful[/green]")
+        else:
+            console.print(f"[red]✗ Connection to '{account_name}' failed: {result}[/red]")
+    if any(result is not True for result in results.values()):
+        raise typer.Exit(1)
 
 
 if __name__ == "__main__":
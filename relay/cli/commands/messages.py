@@ -6,27 +6,41 @@
 """Messages CLI commands."""
 
 import functools
-from collections.abc import Callable
+import re
+from collections.abc import Iterable
 from datetime import UTC, datetime
 from enum import StrEnum
-from typing import Annotated, Any
+from typing import TYPE_CHECKING, Annotated, Any
 
 import typer
 from rich.console import Console
-from rich.table import Table
 
-from relay.auth.account import AccountManager
-from relay.exceptions import AccountNotFoundError, AuthenticationError, ServerConnectionError, ValidationError
-from relay.models.message import MessageSummary
+from relay.exceptions import ValidationError
 
-from .._utils import AliasGroup, create_messages_table
+from .._utils import AliasGroup, create_messages_table, handle_cli_errors
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+    from relay.auth.account import AccountManager
+    from relay.models.account import Account
+    from relay.models.message import MessageSummary
+    from relay.providers.imap import IMAPClient
 
 console = Console()
 app = typer.Typer(help="Email message commands", cls=AliasGroup)
+_handle_common_errors = handle_cli_errors(console, unexpected_label="Error")
+
+# Sort key of the messages without a date
+_UNDATED = datetime.min.replace(tzinfo=UTC)
 
 
+@functools.lru_cache(maxsize=4096)
 def format_timestamp_to_utc(timestamp_str: str) -> str:
     """Convert ISO timestamp to UTC for display."""
+    # Already in UTC (e.g. "2023-11-15T09:26:03+00:00"): only the separators change
+    if len(timestamp_str) == 25 and timestamp_str[10] == "T" and timestamp_str.endswith("+00:00"):
+        return f"{timestamp_str[:10]} {timestamp_str[11:19]} UTC"
     # Parse ISO format with timezone
     dt = datetime.fromisoformat(timestamp_str)
     # Convert to UTC and format
@@ -36,68 +50,83 @@ def format_timestamp_to_utc(timestamp_str: str) -> str:
 # --- Helper Functions for DRY Code ---
 
 
-def _get_account_manager_and_client(account: str) -> tuple[AccountManager, Any, str]:
-    """Get account manager, IMAP client, and account name.
+@functools.cache
+def _get_account_manager() -> "AccountManager":
+    """Get the account manager instance shared by the commands."""
+    # Deferred: pulls in pydantic models and the IMAP stack
+    from relay.auth.account import AccountManager
+
+    return AccountManager()
+
+
+def _get_account_and_client(account: str) -> tuple["Account", "IMAPClient"]:
+    """Get the account and a connected IMAP client, resolving the account once.
 
     Returns:
-        Tuple of (AccountManager, IMAPClient, account_name)
+        Tuple of (Account, IMAPClient)
 
     """
-    manager = AccountManager()
+    manager = _get_account_manager()
 
-    # If no account specified, get first available account
+    # If no account specified, use the first available account
     if not account:
-        accounts = manager.list_accounts()
-        if not accounts:
+        account_info = manager.get_default_account()
+        if account_info is None:
             console.print("[red]✗ No accounts configured. Use 'relay accounts add' to add an account.[/red]")
             raise typer.Exit(1)
-        account = accounts[0].name
+        account = account_info.name
         console.print(f"[dim]Using account: {account}[/dim]")
-
-    # Get account info
-    account_info = manager.get_account(account)
+    else:
+        # Get account info
+        account_info = manager.get_account(account)
 
     # Connect to IMAP
     with console.status(f"[bold green]Connecting to {account_info.email}...", spinner="dots"):
         client = manager.get_imap_client(account)
 
-    return manager, client, account
+    return account_info, client
 
 
-def _handle_common_errors(func: Callable) -> Callable:
-    """Decorate to handle common IMAP errors."""
+def _filter_messages(messages: Iterable[dict[str, Any]], query: str) -> list[dict[str, Any]]:
+    """Keep the messages whose subject, sender or body contain the query."""
+    # Case-insensitive scan without allocating lowercased copies of every body
+    search = re.compile(re.escape(query), re.IGNORECASE).search
 
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except AccountNotFoundError as e:
-            console.print(f"[red]✗ {e}[/red]")
-            console.print("[dim]Use 'relay accounts ls' to see available accounts[/dim]")
-            raise typer.Exit(1)
-        except AuthenticationError as e:
-            console.print(f"[red]✗ {e}[/red]")
-            raise typer.Exit(1)
-        except ServerConnectionError as e:
-            console.print(f"[red]✗ {e}[/red]")
-            raise typer.Exit(1)
-        except Exception as e:
-            console.print(f"[red]✗ Error: {e}[/red]")
-            raise typer.Exit(1)
+    return [
+        msg
+        for msg in messages
+        # Search in subject, sender, and body (with null checks)
+        if search(msg.get("subject") or "")
+        or search(msg.get("headers", {}).get("From") or "")
+        or search(msg.get("body", {}).get("text_plain") or "")
+    ]
 
-    return wrapper
 
+def _last_uids(uids: list[str], limit: int) -> list[str]:
+    """Keep the most recent UIDs of an ascending list, none if the limit isn't positive."""
+    # Unlike uids[-limit:], a zero or negative limit doesn't select every UID
+    return uids[max(len(uids) - limit, 0) :] if limit > 0 else []
 
-def _add_message_to_table(table: Table, msg: MessageSummary) -> None:
-    """Add a message to the table with consistent formatting."""
-    # Convert timestamp to UTC for display
-    timestamp_str = format_timestamp_to_utc(msg.date)
 
-    # Truncate only subject and snippet - let UID, timestamp, from display fully
-    subject = msg.subject[:27] + "..." if len(msg.subject) > 30 else msg.subject
-    snippet = msg.snippet[:22] + "..." if len(msg.snippet) > 25 else msg.snippet
+def _truncate(text: str, width: int) -> str:
+    """Shorten text to the given width, marking the cut with an ellipsis."""
+    return text if len(text) <= width else f"{text[: width - 3]}..."
 
-    table.add_row(msg.uid, timestamp_str, msg.sender, subject, snippet)
+
+def _build_messages_table(title: str, summaries: Iterable["MessageSummary"]) -> "Table":
+    """Create a messages table populated with consistently formatted rows."""
+    table = create_messages_table(title)
+    add_row = table.add_row
+    for msg in summaries:
+        # Truncate only subject and snippet - let UID, timestamp, from display fully
+        add_row(
+            msg.uid,
+            format_timestamp_to_utc(msg.date),
+            msg.sender,
+            _truncate(msg.subject, 30),
+            _truncate(msg.snippet, 25),
+        )
+    return table
 
 
 # --- Command Functions ---
@@ -111,35 +140,28 @@ def list_messages(
     unread_only: Annotated[bool, typer.Option("--unread", "-u", help="Show only unread messages")] = False,
 ):
     """List recent emails from specified account."""
-    manager, client, account = _get_account_manager_and_client(account)
-    account_info = manager.get_account(account)
-
-    with console.status(f"[bold green]Fetching {limit} {'unread ' if unread_only else ''}messages...", spinner="dots"):
-        # Get email UIDs
-        uids = list(reversed(client.list_email_uids(unseen_only=unread_only)))
-        uids = uids[: min(limit, len(uids))]
-
-        if not uids:
-            client.logout()
-            console.print(f"[yellow]No {'unread ' if unread_only else ''}messages found[/yellow]")
-            return
-
-        # Fetch messages
-        messages = client.fetch_messages(uids, include_quoted_body=False)
-        client.logout()
+    account_info, client = _get_account_and_client(account)
 
-    # Convert to summary objects
-    message_summaries = [MessageSummary.from_message_data(msg) for msg in messages]
+    # Deferred: pulls in pydantic models
+    from relay.auth.cache import MessageCache
 
-    # Create and populate table
-    table = create_messages_table(f"Messages from {account_info.email}")
-    for msg in message_summaries:
-        _add_message_to_table(table, msg)
+    cache = MessageCache(_get_account_manager().storage.config_dir)
+    with console.status(f"[bold green]Fetching {limit} {'unread ' if unread_only else ''}messages...", spinner="dots"):
+        uid_validity, uids, total = client.list_latest_uids(limit, unseen_only=unread_only)
+        # The summary of a UID never changes, so only fetch the ones that aren't cached yet
+        summaries = cache.load(account_info.name, uid_validity)
+        missing_uids = [uid for uid in uids if uid not in summaries]
+        if missing_uids:
+            summaries.update((summary.uid, summary) for summary in client.fetch_summaries(missing_uids))
+            cache.save(account_info.name, uid_validity, summaries)
+        message_summaries = [summaries[uid] for uid in uids if uid in summaries]
+
+    if not message_summaries:
+        console.print(f"[yellow]No {'unread ' if unread_only else ''}messages found[/yellow]")
+        return
 
-    console.print(table)
-    console.print(
-        f"[dim]Showing {len(message_summaries)} of {len(uids)} {'unread ' if unread_only else ''}messages[/dim]"
-    )
+    console.print(_build_messages_table(f"Messages from {account_info.email}", message_summaries))
+    console.print(f"[dim]Showing {len(message_summaries)} of {total} {'unread ' if unread_only else ''}messages[/dim]")
 
 
 @app.command("open | cat")
@@ -149,46 +171,55 @@ def open_message(
     account: Annotated[str, typer.Option("--account", "-a", help="Account name to use")] = "",
 ):
     """Read a single email message by UID."""
-    _, client, account = _get_account_manager_and_client(account)
+    account_info, client = _get_account_and_client(account)
 
-    with console.status(f"[bold green]Fetching message {uid}...", spinner="dots"):
-        # Fetch the specific message
-        message = client.fetch_message(uid, include_quoted_body=False)
-        client.logout()
+    # Deferred: pulls in pydantic models
+    from relay.auth.cache import MessageCache
 
-    # Display message details
-    console.print("\n[bold blue]Message Details[/bold blue]")
-    console.print(f"[cyan]UID:[/cyan] {message['uid']}")
-    console.print(f"[cyan]Timestamp:[/cyan] {format_timestamp_to_utc(message.get('date', 'N/A'))}")
-    console.print(f"[cyan]Subject:[/cyan] {message.get('subject', 'N/A')}")
+    cache = MessageCache(_get_account_manager().storage.config_dir)
+    with console.status(f"[bold green]Fetching message {uid}...", spinner="dots"):
+        # The content of a UID never changes, so only fetch it if it isn't cached yet
+        uid_validity = client.get_uid_validity()
+        message = cache.load_message(account_info.name, uid_validity, uid)
+        if message is None:
+            # Only the attachment metadata is displayed
+            message = client.fetch_message(uid, include_quoted_body=False, include_attachment_content=False)
+            cache.save_message(account_info.name, uid_validity, message)
 
     # Extract headers
     headers = message.get("headers", {})
     sender = headers.get("From", "N/A")
     cc = headers.get("CC", headers.get("Cc", "N/A"))
     bcc = headers.get("BCC", headers.get("Bcc", "N/A"))
-
-    console.print(f"[cyan]From:[/cyan] {sender}")
-    console.print(f"[cyan]CC:[/cyan] {cc}")
-    console.print(f"[cyan]BCC:[/cyan] {bcc}")
-
-    # Display body
     body = message.get("body", {})
     text_body = body.get("text_plain", "No plain text body available")
-    console.print("\n[bold green]Message Body:[/bold green]")
-    console.print(f"[white]{text_body}[/white]")
+
+    # Assemble the whole output to write it in a single print
+    lines = [
+        "\n[bold blue]Message Details[/bold blue]",
+        f"[cyan]UID:[/cyan] {message['uid']}",
+        f"[cyan]Timestamp:[/cyan] {format_timestamp_to_utc(message.get('date', 'N/A'))}",
+        f"[cyan]Subject:[/cyan] {message.get('subject', 'N/A')}",
+        f"[cyan]From:[/cyan] {sender}",
+        f"[cyan]CC:[/cyan] {cc}",
+        f"[cyan]BCC:[/cyan] {bcc}",
+        "\n[bold green]Message Body:[/bold green]",
+        f"[white]{text_body}[/white]",
+    ]
 
     # Display attachments
     attachments = body.get("attachments", [])
     if attachments:
-        console.print(f"\n[bold yellow]Attachments ({len(attachments)}):[/bold yellow]")
-        for i, attachment in enumerate(attachments, 1):
-            filename = attachment.get("filename", f"attachment_{i}")
-            content_type = attachment.get("content_type", "unknown")
-            size = attachment.get("size", 0)
-            console.print(f"  {i}. [cyan]{filename}[/cyan] ({content_type}, {size} bytes)")
+        lines.append(f"\n[bold yellow]Attachments ({len(attachments)}):[/bold yellow]")
+        lines.extend(
+            f"  {i}. [cyan]{attachment.get('filename', f'attachment_{i}')}[/cyan] "
+            f"({attachment.get('content_type', 'unknown')}, {attachment.get('size', 0)} bytes)"
+            for i, attachment in enumerate(attachments, 1)
+        )
     else:
-        console.print("\n[dim]No attachments[/dim]")
+        lines.append("\n[dim]No attachments[/dim]")
+
+    console.print("\n".join(lines))
 
 
 @app.command("search | find | grep")
@@ -196,61 +227,40 @@ def open_message(
 def search_messages(
     query: Annotated[str, typer.Argument(help="Search query")],
     account: Annotated[str, typer.Option("--account", "-a", help="Account name to use")] = "",
-    limit: Annotated[int, typer.Option("--limit", "-l", help="Number of messages to search")] = 100,
+    limit: Annotated[int, typer.Option("--limit", "-l", help="Maximum number of messages to return")] = 100,
+    unread_only: Annotated[bool, typer.Option("--unread", "-u", help="Search only unread messages")] = False,
 ):
     """Search for messages containing the specified query."""
-    manager, client, account = _get_account_manager_and_client(account)
-    account_info = manager.get_account(account)
-
-    with console.status(f"[bold green]Searching for '{query}'...", spinner="dots"):
-        # Get recent messages to search through
-        uids = client.list_email_uids(unseen_only=False)
-        search_uids = uids[:limit]
-
-        if not search_uids:
-            client.logout()
-            console.print("[yellow]No messages found to search[/yellow]")
-            return
-
-        # Fetch messages and search through them
-        messages = client.fetch_messages(search_uids, include_quoted_body=False)
-        client.logout()
+    from relay.models.message import MessageSummary
 
-    # Filter messages that contain the query
-    matching_messages = []
-    query_lower = query.lower()
+    account_info, client = _get_account_and_client(account)
 
-    for msg in messages:
-        # Search in subject, sender, and body (with null checks)
-        subject = (msg.get("subject") or "").lower()
-        sender = (msg.get("headers", {}).get("From") or "").lower()
-        body_text = (msg.get("body", {}).get("text_plain") or "").lower()
-
-        if query_lower in subject or query_lower in sender or query_lower in body_text:
-            matching_messages.append(msg)
-
-    if not matching_messages:
+    with console.status(f"[bold green]Searching for '{query}'...", spinner="dots"):
+        try:
+            # Let the server match subject, sender and body
+            matching_uids = _last_uids(client.search_email_uids(query, unseen_only=unread_only), limit)
+        except (ValueError, ValidationError):
+            # Query the server can't search (non-ASCII, line breaks) or no server-side search: scan recent messages locally
+            matching_uids = None
+
+        if matching_uids is None:
+            search_uids = _last_uids(client.list_email_uids(unseen_only=unread_only), limit)
+            # Parsed one at a time: only the matching messages are kept in memory
+            matching_messages = _filter_messages(client.iter_messages(search_uids, include_quoted_body=False), query)
+            message_summaries = [MessageSummary.from_message_data(msg) for msg in matching_messages]
+        else:
+            # Fetch headers and a body preview only
+            message_summaries = client.fetch_summaries(matching_uids)
+
+    if not message_summaries:
         console.print(f"[yellow]No messages found containing '{query}'[/yellow]")
         return
 
-    # Convert to summary objects and sort by date (newest first)
-    message_summaries = [MessageSummary.from_message_data(msg) for msg in matching_messages]
-
     # Sort by date (newest first) - handle cases where date might be empty
-    message_summaries.sort(
-        key=lambda x: datetime.fromisoformat(x.date) if x.date else datetime.min.replace(tzinfo=UTC),
-        reverse=True,
-    )
-
-    table = create_messages_table(f"Search Results for '{query}' in {account_info.email}")
-
-    for msg in message_summaries:
-        _add_message_to_table(table, msg)
+    message_summaries.sort(key=lambda x: datetime.fromisoformat(x.date) if x.date else _UNDATED, reverse=True)
 
-    console.print(table)
-    console.print(
-        f"[dim]Found {len(matching_messages)} messages containing '{query}' (searched {len(search_uids)} messages)[/dim]"
-    )
+    console.print(_build_messages_table(f"Search Results for '{query}' in {account_info.email}", message_summaries))
+    console.print(f"[dim]Found {len(message_summaries)} messages containing '{query}'[/dim]")
 
 
 @app.command("trash | rm")
@@ -260,11 +270,15 @@ def trash_message(
     account: Annotated[str, typer.Option("--account", "-a", help="Account name to use")] = "",
 ):
     """Move a message to trash."""
-    _, client, account = _get_account_manager_and_client(account)
+    account_info, client = _get_account_and_client(account)
+
+    # Deferred: pulls in pydantic models
+    from relay.auth.cache import MessageCache
 
     with console.status(f"[bold green]Moving message {uid} to trash...", spinner="dots"):
         client.move_to_trash(uid)
-        client.logout()
+    # The message left the inbox
+    MessageCache(_get_account_manager().storage.config_dir).discard_message(account_info.name, uid)
 
     console.print(f"[green]✓ Message {uid} moved to trash[/green]")
 
@@ -276,11 +290,15 @@ def mark_message_spam(
     account: Annotated[str, typer.Option("--account", "-a", help="Account name to use")] = "",
 ):
     """Mark a message as spam."""
-    _, client, account = _get_account_manager_and_client(account)
+    account_info, client = _get_account_and_client(account)
+
+    # Deferred: pulls in pydantic models
+    from relay.auth.cache import MessageCache
 
     with console.status(f"[bold green]Marking message {uid} as spam...", spinner="dots"):
         client.mark_as_spam(uid)
-        client.logout()
+    # The message left the inbox
+    MessageCache(_get_account_manager().storage.config_dir).discard_message(account_info.name, uid)
 
     console.print(f"[green]✓ Message {uid} marked as spam[/green]")
 
@@ -300,7 +318,7 @@ def mark_message(
     account: Annotated[str, typer.Option("--account", "-a", help="Account name to use")] = "",
 ):
     """Mark a message as read or unread."""
-    _, client, account = _get_account_manager_and_client(account)
+    _, client = _get_account_and_client(account)
 
     with console.status(f"[bold blue]Marking message {uid} as {status.value}...", spinner="dots"):
         try:
@@ -308,9 +326,7 @@ def mark_message(
                 client.mark_as_read(uid)
             else:  # action == "unread"
                 client.mark_as_unread(uid)
-            client.logout()
         except ValidationError as e:
-            client.logout()
             console.print(f"[red]Error: {e}[/red]")
             raise typer.Exit(1)
 
@@ -5,15 +5,19 @@
 
 """Account models for the Relay library."""
 
+import re
 from typing import Annotated
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 
-from ..providers.utils import EMAIL_TO_PROVIDER, PROVIDER_INFO
+from ..providers.utils import PROVIDER_INFO, resolve_provider
 from .base import EmailProvider
 
 __all__ = ["Account", "AccountCreate", "AccountInfo"]
 
+# Letters, numbers, hyphens, underscores and dots, with at least one letter or number
+ACCOUNT_NAME_PATTERN = re.compile(r"[\w.-]*[^\W_][\w.-]*")
+
 
 class AccountBase(BaseModel):
     """Base account model with common fields."""
@@ -27,7 +31,7 @@ class AccountBase(BaseModel):
     @field_validator("name")
     @classmethod
     def validate_name(cls, v: str) -> str:
-        if not v.replace("-", "").replace("_", "").replace(".", "").isalnum():
+        if ACCOUNT_NAME_PATTERN.fullmatch(v) is None:
             raise ValueError("Account name can only contain letters, numbers, hyphens, underscores, and dots")
         return v
 
@@ -37,24 +41,33 @@ class AccountCreate(AccountBase):
 
     password: str = Field(..., min_length=1, description="Account password")
 
-    def __init__(self, **data) -> None:
-        """Initialize with auto-detection of provider-specific settings."""
+    @model_validator(mode="before")
+    @classmethod
+    def fill_provider_settings(cls, data: object) -> object:
+        """Auto-detect the provider and fill in its server settings.
+
+        Args:
+            data: Raw input data
+
+        Returns:
+            Input data completed with provider-specific settings
+        """
+        if not isinstance(data, dict):
+            return data
+        data = dict(data)
+
         # Auto-detect provider from email if not set
-        if "provider" not in data or data["provider"] == "custom":
-            email = data.get("email", "")
-            data["provider"] = EMAIL_TO_PROVIDER.get(email.rpartition("@")[-1].lower(), EmailProvider.CUSTOM)
+        if data.get("provider", "custom") == "custom":
+            data["provider"] = resolve_provider(data.get("email", "")) or EmailProvider.CUSTOM
 
         # Auto-fill server settings based on provider
-        provider = data.get("provider", EmailProvider.CUSTOM)
-        if isinstance(provider, str):
-            provider = EmailProvider(provider)
-
-        if provider in PROVIDER_INFO and not data.get("imap_server") and provider != EmailProvider.CUSTOM:
-            data["imap_server"] = PROVIDER_INFO[provider]["imap"]["server"]
-        if provider in PROVIDER_INFO and not data.get("imap_port") and provider != EmailProvider.CUSTOM:
-            data["imap_port"] = PROVIDER_INFO[provider]["imap"]["port"]
+        if (imap_info := PROVIDER_INFO.get(data["provider"], {}).get("imap")) is not None:
+            if not data.get("imap_server"):
+                data["imap_server"] = imap_info["server"]
+            if not data.get("imap_port"):
+                data["imap_port"] = imap_info["port"]
 
-        super().__init__(**data)
+        return data
 
 
 class Account(AccountBase):
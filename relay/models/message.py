@@ -5,12 +5,17 @@
 
 """Message models for the Relay library."""
 
+from email.utils import parseaddr
 from typing import Any
 
 from pydantic import BaseModel, Field
 
 __all__ = ["MessageInfo", "MessageSummary"]
 
+SNIPPET_LENGTH = 100
+# Newlines become spaces and carriage returns are dropped in snippets
+_SNIPPET_TRANSLATION = str.maketrans({"\n": " ", "\r": None})
+
 
 class MessageInfo(BaseModel):
     """Complete message information."""
@@ -46,19 +51,20 @@ class MessageSummary(BaseModel):
         headers = message_data.get("headers", {})
         body = message_data.get("body", {})
 
-        # Extract sender from From header
+        # Extract email from "Name <email@domain.com>" format, keeping the raw header if it holds no address
         sender = headers.get("From", "")
-        if "<" in sender and ">" in sender:
-            # Extract email from "Name <email@domain.com>" format
-            sender = sender.split("<")[-1].split(">")[0]
+        address = parseaddr(sender)[1]
+        if "@" in address:
+            sender = address
 
         # Create snippet from plain text body
         text_plain = body.get("text_plain", "")
         snippet = ""
         if text_plain:
-            # Take first 100 characters, remove newlines
-            snippet = text_plain.replace("\n", " ").replace("\r", "").strip()[:100]
-            if len(text_plain) > 100:
+            # Take first 100 characters, remove newlines (margins cover leading whitespace and dropped CRs)
+            head = text_plain[: 4 * SNIPPET_LENGTH].lstrip()[: 2 * SNIPPET_LENGTH]
+            snippet = head.translate(_SNIPPET_TRANSLATION).strip()[:SNIPPET_LENGTH]
+            if len(text_plain) > SNIPPET_LENGTH:
                 snippet += "..."
 
         return cls(
@@ -4,24 +4,33 @@
 # See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
 
 import base64
+import binascii
 import re
+from collections.abc import Iterator
 from email import message_from_bytes
-from email.message import EmailMessage
-from email.parser import Parser
+from email.message import EmailMessage, Message
+from email.parser import HeaderParser
 from email.utils import parsedate_to_datetime
 from imaplib import IMAP4, IMAP4_SSL
 from socket import gaierror
 from typing import Any, cast
 
-from bs4 import BeautifulSoup
 from email_validator import EmailNotValidError, validate_email
-from html2text import html2text
 
 from ..exceptions import AuthenticationError, ServerConnectionError, ValidationError
 from ..models.account import EmailProvider
-from .utils import EMAIL_TO_PROVIDER, IMAP_TO_PROVIDER, PROVIDER_INFO
-
-EMAIL_PATTERN = r"<[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}>"
+from ..models.message import MessageSummary
+from .utils import IMAP_TO_PROVIDER, PROVIDER_INFO, resolve_provider
+
+EMAIL_PATTERN = re.compile(r"<[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}>")
+FETCH_UID_PATTERN = re.compile(rb"UID (\d+)")
+STATUS_UIDVALIDITY_PATTERN = re.compile(rb"UIDVALIDITY (\d+)")
+# Any sequence of leading reply or forward markers, e.g. "Re: Fwd: RE:"
+SUBJECT_PREFIX_PATTERN = re.compile(r"^(?:\s*(?:re|fwd?)\s*:)+", re.IGNORECASE)
+# Maximum number of UIDs per FETCH command, long UID sets get rejected by some servers
+FETCH_BATCH_SIZE = 100
+# Header and first bytes of the body: enough to build a message summary
+SUMMARY_PARTS = "BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.{preview_size}>"
 
 __all__ = ["IMAPClient"]
 
@@ -66,8 +75,7 @@ class IMAPClient:
         # Provider resolution
         if provider is None:
             # Try with email
-            email_domain = email_address.rpartition("@")[-1].lower()
-            provider = EMAIL_TO_PROVIDER.get(email_domain)
+            provider = resolve_provider(email_address)
             if provider is None:
                 if imap_server is None:
                     raise ValueError("Either specify a provider or IMAP server address")
@@ -96,18 +104,47 @@ class IMAPClient:
             raise AuthenticationError("Invalid IMAP credentials")
 
         self.provider = provider
+        # Folder names of the provider, e.g. for trash and spam
+        self.folders: dict[str, str] = PROVIDER_INFO[provider]["folders"]
+        # Capabilities of the authenticated session: servers usually advertise them in the LOGIN response,
+        # which must be read now since selecting a folder discards the pending responses
+        self._capabilities: frozenset[str] | None = None
+        capabilities = self._imap.response("CAPABILITY")[1]
+        if capabilities and isinstance(capabilities[-1], bytes):
+            self._capabilities = frozenset(capabilities[-1].decode().upper().split())
 
     def logout(self) -> None:
         """Logout from the IMAP server."""
         self._imap.logout()
 
-    def _select(self, folder: str = "INBOX", readonly: bool = True) -> None:
+    def is_alive(self) -> bool:
+        """Check whether the IMAP session can still be used.
+
+        Returns:
+            True if the server acknowledged a NOOP
+        """
+        try:
+            status_, _ = self._imap.noop()
+        except (IMAP4.error, OSError):
+            return False
+        return status_ == "OK"
+
+    def _supports(self, capability: str) -> bool:
+        if self._capabilities is None:
+            # Not advertised at login: ask for them, once per session
+            _, res = self._imap.capability()
+            self._capabilities = frozenset(res[-1].decode().upper().split())
+        return capability in self._capabilities
+
+    def _select(self, folder: str = "INBOX", readonly: bool = True) -> int:
         try:
             status_, res = self._imap.select(folder, readonly=readonly)
             if status_ != "OK":
                 raise ValueError(res[0].decode())
         except IMAP4.error:
             raise ValidationError(f"Invalid folder: {folder}")
+        # Number of messages in the folder
+        return int(res[0] or 0)
 
     def list_flags(self, **kwargs) -> list[str]:
         """List flags for the selected folder.
@@ -152,6 +189,22 @@ class IMAPClient:
     def _fetch(self, uid: str, msg_parts: str) -> list[list[bytes]]:
         return cast(list[list[bytes]], self._uid("FETCH", uid, msg_parts))
 
+    def _fetch_batches(self, uids: list[str], msg_parts: str) -> Iterator[tuple[list[str], dict[str, list[bytes]]]]:
+        for idx in range(0, len(uids), FETCH_BATCH_SIZE):
+            batch = uids[idx : idx + FETCH_BATCH_SIZE]
+            yield batch, parse_fetch_response(self._fetch(compress_uids(batch), msg_parts))
+
+    def _seq_fetch(self, message_set: str, msg_parts: str) -> list[list[bytes]]:
+        try:
+            status_, res = self._imap.fetch(message_set, msg_parts)
+        except IMAP4.error as e:
+            self._imap.close()
+            raise ValidationError(e)
+        if status_ != "OK":
+            self._imap.close()
+            raise ValidationError(status_)
+        return cast(list[list[bytes]], res)
+
     def list_email_uids(self, unseen_only: bool = False, **kwargs) -> list[str]:
         """List email UIDs.
 
@@ -167,8 +220,96 @@ class IMAPClient:
         self._imap.close()
         return res[0].decode().split()
 
+    def list_latest_uids(self, limit: int, unseen_only: bool = False, **kwargs) -> tuple[str, list[str], int]:
+        """List the UIDs of the most recent emails.
+
+        Args:
+            limit: Maximum number of UIDs to list
+            unseen_only: Whether to only list unseen emails
+            kwargs: Additional IMAP parameters
+
+        Returns:
+            Tuple of (UIDVALIDITY of the folder, UIDs newest first, total number of matching emails)
+        """
+        num_messages = self._select(readonly=True, **kwargs)
+        _, uid_validity = self._imap.response("UIDVALIDITY")
+        uids: list[str] = []
+        total = num_messages
+        if unseen_only:
+            unseen_uids = self._search("UNSEEN")[0].decode().split()
+            total = len(unseen_uids)
+            uids = latest_uids(unseen_uids, limit)
+        elif num_messages > 0 and limit > 0:
+            # Sequence numbers follow arrival order, so the latest messages don't need a prior SEARCH
+            content = self._seq_fetch(f"{max(num_messages - limit + 1, 1)}:{num_messages}", "(UID)")
+            # The server may answer in any order
+            uids = sorted(
+                (
+                    match.group(1).decode()
+                    for item in content
+                    if isinstance(item, bytes) and (match := FETCH_UID_PATTERN.search(item))
+                ),
+                key=int,
+                reverse=True,
+            )[:limit]
+        self._imap.close()
+        return (uid_validity[0] or b"").decode(), uids, total
+
+    def get_uid_validity(self, folder: str = "INBOX") -> str:
+        """Get the UIDVALIDITY of a folder without selecting it.
+
+        Args:
+            folder: Folder name
+
+        Returns:
+            UIDVALIDITY of the folder, empty if the server didn't report it
+
+        Raises:
+            ValidationError: If the folder is invalid
+        """
+        try:
+            status_, res = self._imap.status(folder, "(UIDVALIDITY)")
+        except IMAP4.error:
+            raise ValidationError(f"Invalid folder: {folder}")
+        if status_ != "OK" or not isinstance(res[0], bytes):
+            return ""
+        match = STATUS_UIDVALIDITY_PATTERN.search(res[0])
+        return match.group(1).decode() if match else ""
+
+    def search_email_uids(self, query: str, unseen_only: bool = False, **kwargs) -> list[str]:
+        """Search email UIDs whose subject, sender or body contain a text query.
+
+        Args:
+            query: Text to search for
+            unseen_only: Whether to only search unseen emails
+            kwargs: Additional IMAP parameters
+
+        Returns:
+            List of matching email UIDs
+
+        Raises:
+            ValueError: If the query is not ASCII or contains line breaks
+        """
+        if not query.isascii():
+            raise ValueError("IMAP text search only supports ASCII queries")
+        # Quoted strings can't contain CR or LF, which would end the command line
+        if "\r" in query or "\n" in query:
+            raise ValueError("IMAP text search doesn't support line breaks in queries")
+        # Quoted string as per RFC 3501
+        quoted = '"' + query.replace("\\", "\\\\").replace('"', '\\"') + '"'
+        self._select(readonly=True, **kwargs)
+        criteria = f"OR OR SUBJECT {quoted} FROM {quoted} BODY {quoted}"
+        res = self._search(f"UNSEEN {criteria}" if unseen_only else criteria)
+        self._imap.close()
+        return res[0].decode().split()
+
     def fetch_message(
-        self, uid: str, headers_set: set | None = None, include_quoted_body: bool = False, **kwargs
+        self,
+        uid: str,
+        headers_set: set | None = None,
+        include_quoted_body: bool = False,
+        include_attachment_content: bool = True,
+        **kwargs,
     ) -> dict[str, Any]:
         """Fetch a single email message.
 
@@ -176,6 +317,7 @@ class IMAPClient:
             uid: Email UID
             headers_set: Set of headers to include
             include_quoted_body: Whether to include quoted body
+            include_attachment_content: Whether to include the base64-encoded content of attachments
             kwargs: Additional IMAP parameters
 
         Returns:
@@ -189,21 +331,13 @@ class IMAPClient:
             "uid": uid,
             "thread_id": resolve_thread_id(message),
             "date": parsedate_to_datetime(message.get("Date", "")).isoformat(),
-            "subject": message.get(
-                "Thread-Topic",
-                message.get("Subject", "")
-                .replace("Re:", "")
-                .replace("RE:", "")
-                .replace("Fwd:", "")
-                .replace("FWD:", "")
-                .strip(),
-            ),
+            "subject": resolve_subject(message),
             "headers": {
                 "Message-ID" if k.lower() == "message-id" else k: v.strip()
                 for k, v in message.items()
                 if headers_set is None or k in headers_set
             },
-            "body": parse_email_parts(message, include_quoted_body),
+            "body": parse_email_parts(message, include_quoted_body, include_attachment_content),
         }
 
     def fetch_headers(self, uids: list[str], headers_set: set, **kwargs) -> list[dict[str, Any]]:
@@ -222,12 +356,16 @@ class IMAPClient:
             return []
 
         msg_parts = f"(BODY.PEEK[HEADER.FIELDS ({' '.join(tuple(headers_set))})])"
-        content = self._fetch(",".join(uids), msg_parts.upper())
+        fetched = {}
+        for _, batch_fetched in self._fetch_batches(uids, msg_parts.upper()):
+            fetched.update(batch_fetched)
         self._imap.close()
-        parser_ = Parser()
+        # Only header fields are fetched, and decoding them first keeps non-ASCII values readable
+        parser_ = HeaderParser()
         return [
-            {"uid": uid, "headers": dict(parser_.parsestr(res[1].decode("utf-8"), headersonly=True).items())}
-            for uid, res in zip(uids, content[::2], strict=True)
+            {"uid": uid, "headers": dict(parser_.parsestr(fetched[uid][0].decode("utf-8")).items())}
+            for uid in uids
+            if uid in fetched
         ]
 
     def fetch_messages(
@@ -246,38 +384,77 @@ class IMAPClient:
             kwargs: Additional IMAP parameters
 
         Returns:
-            List of dictionaries of email messages
+            List of dictionaries of email messages, in the order of the requested UIDs
+        """
+        return list(self.iter_messages(uids, headers_set, include_quoted_body, **kwargs))
+
+    def iter_messages(
+        self,
+        uids: list[str],
+        headers_set: set | None = None,
+        include_quoted_body: bool = False,
+        **kwargs,
+    ) -> Iterator[dict[str, Any]]:
+        """Fetch multiple email messages and parse them one at a time.
+
+        Args:
+            uids: List of email UIDs
+            headers_set: Set of headers to include
+            include_quoted_body: Whether to include quoted body
+            kwargs: Additional IMAP parameters
+
+        Yields:
+            Dictionary of each email message, in the order of the requested UIDs
+        """
+        self._select(readonly=True, **kwargs)
+        if len(uids) == 0:
+            return
+
+        # One round-trip per batch of UIDs, the server may answer in any order
+        for batch, fetched in self._fetch_batches(uids, "(BODY.PEEK[])"):
+            for uid in batch:
+                # Release the raw message as soon as it is parsed
+                literals = fetched.pop(uid, None)
+                if literals is None:
+                    continue
+                message = cast(EmailMessage, message_from_bytes(literals[0]))
+                yield {
+                    "uid": uid,
+                    "thread_id": resolve_thread_id(message),
+                    "subject": resolve_subject(message),
+                    "date": parsedate_to_datetime(message.get("Date", "")).isoformat(),
+                    "headers": {
+                        "Message-ID" if k.lower() == "message-id" else k: v.strip()
+                        for k, v in message.items()
+                        if headers_set is None or k in headers_set
+                    },
+                    "body": parse_email_parts(message, include_quoted_body=include_quoted_body),
+                }
+        self._imap.close()
+
+    def fetch_summaries(self, uids: list[str], preview_size: int = 2048, **kwargs) -> list[MessageSummary]:
+        """Fetch summaries of multiple email messages without downloading their full content.
+
+        Args:
+            uids: List of email UIDs
+            preview_size: Number of body bytes to fetch for the snippet
+            kwargs: Additional IMAP parameters
+
+        Returns:
+            List of message summaries, in the order of the requested UIDs
         """
         self._select(readonly=True, **kwargs)
         if len(uids) == 0:
             return []
 
-        content = self._fetch(",".join(uids), "(RFC822)")
-        self._imap.close()
-        email_messages = [cast(EmailMessage, message_from_bytes(res[1])) for res in content[::2]]
-        return [
-            {
-                "uid": uid,
-                "thread_id": resolve_thread_id(message),
-                "subject": message.get(
-                    "Thread-Topic",
-                    message.get("Subject", "")
-                    .replace("Re:", "")
-                    .replace("RE:", "")
-                    .replace("Fwd:", "")
-                    .replace("FWD:", "")
-                    .strip(),
-                ),
-                "date": parsedate_to_datetime(message.get("Date", "")).isoformat(),
-                "headers": {
-                    "Message-ID" if k.lower() == "message-id" else k: v.strip()
-                    for k, v in message.items()
-                    if headers_set is None or k in headers_set
-                },
-                "body": parse_email_parts(message, include_quoted_body=include_quoted_body),
-            }
-            for uid, message in zip(reversed(uids), email_messages, strict=True)
+        msg_parts = f"({SUMMARY_PARTS.format(preview_size=preview_size)})"
+        summaries = [
+            summary
+            for batch, fetched in self._fetch_batches(uids, msg_parts)
+            for summary in build_summaries(fetched, batch)
         ]
+        self._imap.close()
+        return summaries
 
     def mark_as_read(self, uid: str) -> None:
         """Mark email as read.
@@ -299,16 +476,17 @@ class IMAPClient:
         self._flags(uid, "-", "\\Seen")
         self._imap.close()
 
-    def move_to_trash(self, uid: str) -> None:
-        """Move email to trash folder.
-
-        Args:
-            uid: Email UID
-        """
+    def _move_from_inbox(self, uid: str, folder: str) -> None:
         self._select("INBOX", readonly=False)
 
-        # First copy to trash folder
-        self._copy(uid, PROVIDER_INFO[self.provider]["folders"]["trash"])
+        # MOVE (RFC 6851) does it in a single command, and only affects this message
+        if self._supports("MOVE"):
+            self._uid("MOVE", uid, folder)
+            self._imap.close()
+            return
+
+        # Otherwise copy to the folder
+        self._copy(uid, folder)
 
         # Then mark as deleted
         self._flags(uid, "+", "\\Deleted")
@@ -321,6 +499,14 @@ class IMAPClient:
 
         self._imap.close()
 
+    def move_to_trash(self, uid: str) -> None:
+        """Move email to trash folder.
+
+        Args:
+            uid: Email UID
+        """
+        self._move_from_inbox(uid, self.folders["trash"])
+
     def delete_email(self, uid: str) -> None:
         """Delete email permanently.
 
@@ -345,21 +531,158 @@ class IMAPClient:
         Args:
             uid: Email UID
         """
-        self._select("INBOX", readonly=False)
+        self._move_from_inbox(uid, self.folders["spam"])
 
-        # First copy to spam folder
-        self._copy(uid, PROVIDER_INFO[self.provider]["folders"]["spam"])
 
-        # Then mark as deleted from inbox
-        self._flags(uid, "+", "\\Deleted")
+def latest_uids(uids: list[str], limit: int) -> list[str]:
+    """Select the most recent UIDs of an ascending UID list.
 
-        # Finally expunge from inbox
-        status_, _ = self._imap.expunge()
-        if status_ != "OK":
-            self._imap.close()
-            raise ValidationError(f"Failed to expunge message {uid}: {status_}")
+    Args:
+        uids: List of email UIDs, in ascending order
+        limit: Maximum number of UIDs to select
 
-        self._imap.close()
+    Returns:
+        List of the most recent UIDs, newest first
+    """
+    # Slice before reversing, so that only the selected UIDs get copied
+    return uids[max(len(uids) - limit, 0) :][::-1]
+
+
+def compress_uids(uids: list[str]) -> str:
+    """Format UIDs as an IMAP sequence set, collapsing consecutive UIDs into ranges.
+
+    Args:
+        uids: List of email UIDs
+
+    Returns:
+        Sequence set, e.g. "3:5,9" for UIDs 3, 4, 5 and 9
+    """
+    ranges: list[str] = []
+    start = prev = None
+    for uid in sorted({int(uid) for uid in uids}):
+        if prev is not None and uid == prev + 1:
+            prev = uid
+            continue
+        if start is not None:
+            ranges.append(f"{start}:{prev}" if prev != start else str(start))
+        start = prev = uid
+    if start is not None:
+        ranges.append(f"{start}:{prev}" if prev != start else str(start))
+    return ",".join(ranges)
+
+
+def parse_fetch_response(content: list) -> dict[str, list[bytes]]:
+    """Group the literals of a multi-message FETCH response by UID.
+
+    Args:
+        content: FETCH response data as returned by imaplib
+
+    Returns:
+        Dictionary mapping each UID to its fetched literals
+    """
+    messages: dict[str, list[bytes]] = {}
+    uid, literals = None, []
+    for item in content:
+        if item is None:
+            continue
+        if isinstance(item, tuple):
+            meta = item[0]
+            literals.append(item[1])
+        else:
+            meta = item
+        match = FETCH_UID_PATTERN.search(meta)
+        if match:
+            uid = match.group(1).decode()
+        # The data of each message ends with the closing parenthesis outside of any literal
+        if not isinstance(item, tuple):
+            if uid is not None:
+                messages[uid] = literals
+            uid, literals = None, []
+    return messages
+
+
+def build_summaries(fetched: dict[str, list[bytes]], uids: list[str]) -> list[MessageSummary]:
+    """Build message summaries from the header and body preview fetched for each UID.
+
+    Args:
+        fetched: Dictionary mapping each UID to its fetched literals
+        uids: UIDs to build summaries for, in the expected order
+
+    Returns:
+        List of message summaries, skipping the UIDs that were not fetched
+    """
+    summaries = []
+    for uid in uids:
+        if uid not in fetched:
+            continue
+        # Header then truncated body, as requested: together they parse as a (truncated) message
+        message = cast(EmailMessage, message_from_bytes(b"".join(fetched[uid])))
+        summaries.append(
+            MessageSummary.from_message_data({
+                "uid": uid,
+                "subject": resolve_subject(message),
+                "date": parsedate_to_datetime(message.get("Date", "")).isoformat(),
+                "headers": {"From": message.get("From", "")},
+                "body": {"text_plain": extract_plain_text(message)},
+            })
+        )
+    return summaries
+
+
+def resolve_subject(email_message: EmailMessage) -> str:
+    """Resolve the thread subject, without reply or forward prefixes.
+
+    Args:
+        email_message: Email message
+
+    Returns:
+        Subject
+    """
+    if (thread_topic := email_message.get("Thread-Topic")) is not None:
+        return thread_topic
+    return SUBJECT_PREFIX_PATTERN.sub("", email_message.get("Subject", "")).strip()
+
+
+def extract_plain_text(email_message: EmailMessage, include_quoted_body: bool = False) -> str | None:
+    """Extract the plain text body of an email, i.e. its last plain text part.
+
+    Args:
+        email_message: Email message
+        include_quoted_body: Whether to include quoted body
+
+    Returns:
+        Plain text body, None if the email has no plain text part
+    """
+    body_plain = None
+    if email_message.is_multipart():
+        for part in email_message.walk():
+            if part.get_content_type() == "text/plain":
+                body_plain = decode_payload(part).decode("utf-8", errors="ignore")
+    else:
+        body_plain = decode_payload(email_message).decode("utf-8", errors="ignore")
+
+    if body_plain and not include_quoted_body:
+        body_plain = clear_quoted_body(body_plain)
+    return body_plain
+
+
+def decode_payload(part: Message) -> bytes:
+    """Decode the transfer encoding of a non-multipart message part, even if its content is truncated.
+
+    Args:
+        part: Message part
+
+    Returns:
+        Decoded payload
+    """
+    if part.get("Content-Transfer-Encoding", "").strip().lower() == "base64":
+        # A body preview may end in the middle of a base64 group, which the email package returns undecoded
+        data = "".join(str(part.get_payload()).split())
+        try:
+            return binascii.a2b_base64(data[: len(data) - len(data) % 4])
+        except binascii.Error:
+            pass
+    return part.get_payload(decode=True) or b""
 
 
 def resolve_thread_id(email_message: EmailMessage | dict[str, str]) -> str | None:
@@ -380,42 +703,45 @@ def resolve_thread_id(email_message: EmailMessage | dict[str, str]) -> str | Non
     return email_message.get("Message-ID", email_message.get("Message-Id"))
 
 
-def parse_email_parts(email_message: EmailMessage, include_quoted_body: bool = False) -> dict[str, Any]:
+def parse_email_parts(
+    email_message: EmailMessage, include_quoted_body: bool = False, include_attachment_content: bool = True
+) -> dict[str, Any]:
     """Extract plain text body from email.
 
     Args:
         email_message: Email message
         include_quoted_body: Whether to include quoted body
+        include_attachment_content: Whether to include the base64-encoded content of attachments (None otherwise)
 
     Returns:
         Dictionary of email parts
     """
-    body_plain = None
     body_html = None
     attachments = []
     if email_message.is_multipart():
         for part in email_message.walk():
-            if part.get_content_type() == "text/plain":
-                body_plain = part.get_payload(decode=True).decode("utf-8", errors="ignore")
+            content_type = part.get_content_type()
+            is_attachment = part.get_content_disposition() == "attachment"
+            # The plain text body is extracted separately
+            if content_type != "text/html" and not is_attachment:
+                continue
+            # Decode the transfer encoding once per part
+            payload = part.get_payload(decode=True) or b""
             # Parse HTML
-            if part.get_content_type() == "text/html":
-                body_html = part.get_payload(decode=True).decode("utf-8", errors="ignore")
+            if content_type == "text/html":
+                body_html = payload.decode("utf-8", errors="ignore")
             # Parse attachments
-            if isinstance(part.get_content_disposition(), str) and part.get_content_disposition() == "attachment":
+            if is_attachment:
                 attachments.append({
                     "filename": part.get_filename(),
-                    "content_type": part.get_content_type(),
-                    "content": base64.b64encode(part.get_payload(decode=True) or b"").decode("utf-8"),
-                    "size": len(part.get_payload(decode=True)) if part.get_payload(decode=True) else 0,
+                    "content_type": content_type,
+                    # Encoding inflates the payload by a third, so only do it when the content is wanted
+                    "content": base64.b64encode(payload).decode("ascii") if include_attachment_content else None,
+                    "size": len(payload),
                 })
-    else:
-        body_plain = email_message.get_payload(decode=True).decode("utf-8", errors="ignore")
-
-    if body_plain and not include_quoted_body:
-        body_plain = clear_quoted_body(body_plain)
 
     return {
-        "text_plain": body_plain,
+        "text_plain": extract_plain_text(email_message, include_quoted_body),
         "text_html": body_html,
         "parsed_html": parse_html_body(body_html) if body_html else None,
         "attachments": attachments,
@@ -423,20 +749,22 @@ def parse_email_parts(email_message: EmailMessage, include_quoted_body: bool = F
 
 
 def parse_html_body(body_html: str) -> str:
+    # Deferred: only HTML bodies need them, and BeautifulSoup alone dominates the import time of this module
+    from bs4 import BeautifulSoup  # noqa: PLC0415
+    from html2text import html2text  # noqa: PLC0415
+
+    # BeautifulSoup balances malformed markup and resolves named entities before the conversion
     soup = BeautifulSoup(body_html, "html.parser")
-    return html2text(str(soup))
+    return html2text(soup.decode())
 
 
 def clear_quoted_body(plain_text: str) -> str:
-    # Find the closest email address before the quote
-    match = re.search(EMAIL_PATTERN, plain_text)
-    if not match:
-        return plain_text
-    match_position = match.start()
-    line_index = plain_text[:match_position].count("\n")
-
-    # Find the first empty line before the match line
     lines = plain_text.splitlines()
-    empty_line_idx = next((idx for idx, line in enumerate(reversed(lines[:line_index])) if not line.strip()), None)
-    line_index = line_index if empty_line_idx is None else line_index - empty_line_idx
-    return "\r\n".join(lines[:line_index])
+    # Find the closest email address before the quote, along with the last empty line before it
+    last_empty_idx = None
+    for idx, line in enumerate(lines):
+        if EMAIL_PATTERN.search(line):
+            return "\r\n".join(lines[: idx if last_empty_idx is None else last_empty_idx + 1])
+        if not line.strip():
+            last_empty_idx = idx
+    return plain_text
@@ -11,7 +11,7 @@ from email_validator import EmailNotValidError, validate_email
 
 from ..exceptions import AuthenticationError
 from ..models.account import EmailProvider
-from .utils import EMAIL_TO_PROVIDER, PROVIDER_INFO
+from .utils import PROVIDER_INFO, resolve_provider
 
 __all__ = ["SMTPClient"]
 
@@ -54,8 +54,7 @@ class SMTPClient:
         if smtp_server is None:
             if provider is None:
                 # Try with email
-                email_domain = email_address.rpartition("@")[-1].lower()
-                provider = EMAIL_TO_PROVIDER.get(email_domain)
+                provider = resolve_provider(email_address)
                 if provider is None:
                     raise ValueError("Either specify a provider or SMTP server address")
             else:
@@ -4,9 +4,12 @@
 # See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
 
 
+from collections.abc import Mapping
+from types import MappingProxyType
+
 from ..models.base import EmailProvider
 
-__all__ = ["EMAIL_TO_PROVIDER", "IMAP_TO_PROVIDER", "PROVIDER_INFO", "SMTP_TO_PROVIDER"]
+__all__ = ["EMAIL_TO_PROVIDER", "IMAP_TO_PROVIDER", "PROVIDER_INFO", "SMTP_TO_PROVIDER", "resolve_provider"]
 
 
 PROVIDER_DOMAINS = {
@@ -16,9 +19,10 @@ PROVIDER_DOMAINS = {
     EmailProvider.ICLOUD: ["icloud.com", "me.com", "mac.com"],
 }
 
-EMAIL_TO_PROVIDER: dict[str, EmailProvider] = {
-    domain: provider for provider, domains in PROVIDER_DOMAINS.items() for domain in domains
-}
+# Read-only lookup tables, built once at import time
+EMAIL_TO_PROVIDER: Mapping[str, EmailProvider] = MappingProxyType({
+    domain.lower(): provider for provider, domains in PROVIDER_DOMAINS.items() for domain in domains
+})
 
 
 PROVIDER_INFO = {
@@ -99,9 +103,27 @@ PROVIDER_INFO = {
     },
 }
 
-IMAP_TO_PROVIDER: dict[str, EmailProvider] = {
+IMAP_TO_PROVIDER: Mapping[str, EmailProvider] = MappingProxyType({
     config["imap"]["server"]: provider for provider, config in PROVIDER_INFO.items() if provider != EmailProvider.CUSTOM
-}
-SMTP_TO_PROVIDER: dict[str, EmailProvider] = {
+})
+SMTP_TO_PROVIDER: Mapping[str, EmailProvider] = MappingProxyType({
     config["smtp"]["server"]: provider for provider, config in PROVIDER_INFO.items() if provider != EmailProvider.CUSTOM
-}
+})
+
+
+def resolve_provider(email_address: str) -> EmailProvider | None:
+    """Resolve the email provider from the domain of an email address.
+
+    Args:
+        email_address: Email address
+
+    Returns:
+        Email provider, or None if the domain is unknown
+    """
+    domain = email_address.rpartition("@")[-1].lower().rstrip(".")
+    # Walk up the parent domains so that subdomains (e.g. "mail.yahoo.com") resolve to their provider
+    while domain:
+        if (provider := EMAIL_TO_PROVIDER.get(domain)) is not None:
+            return provider
+        domain = domain.partition(".")[-1]
+    return None
@@ -0,0 +1,97 @@
+# Copyright (C) 2025, Relay.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
+
+"""Tests for account management."""
+
+from imaplib import IMAP4
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from relay.auth.account import AccountManager
+from relay.auth.imap_pool import IMAPPool
+from relay.exceptions import AuthenticationError
+from relay.models.account import AccountCreate, EmailProvider
+
+SAMPLE_ACCOUNT = AccountCreate(
+    name="test_account",
+    email="test@example.com",
+    password="supersecret",  # noqa: S106
+    provider=EmailProvider.CUSTOM,
+    imap_server="imap.example.com",
+)
+
+
+@pytest.fixture
+def account_manager(config_dir: Path, mocker: MockerFixture) -> AccountManager:
+    """Returns an AccountManager with one stored account and an empty IMAP pool."""
+    mocker.patch("relay.auth.account._IMAP_POOL", IMAPPool())
+    manager = AccountManager(config_dir)
+    manager.storage.add_account(SAMPLE_ACCOUNT)
+    return manager
+
+
+def test_get_imap_client_reuses_live_session(account_manager: AccountManager, mocker: MockerFixture):
+    """Test that a live IMAP session is reused instead of logging in again."""
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_ssl.return_value.noop.return_value = ("OK", [b"NOOP completed"])
+
+    client = account_manager.get_imap_client(SAMPLE_ACCOUNT.name)
+    assert account_manager.get_imap_client(SAMPLE_ACCOUNT.name) is client
+    mock_imap_ssl.assert_called_once_with("imap.example.com", 993)
+    mock_imap_ssl.return_value.login.assert_called_once_with(SAMPLE_ACCOUNT.email, SAMPLE_ACCOUNT.password)
+
+
+def test_get_imap_client_reconnects_dead_session(account_manager: AccountManager, mocker: MockerFixture):
+    """Test that a dropped IMAP session is replaced by a new one."""
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_ssl.return_value.noop.side_effect = IMAP4.abort("socket error: EOF")
+
+    client = account_manager.get_imap_client(SAMPLE_ACCOUNT.name)
+    assert account_manager.get_imap_client(SAMPLE_ACCOUNT.name) is not client
+    assert mock_imap_ssl.call_count == 2
+
+
+def test_test_all_accounts(account_manager: AccountManager, mocker: MockerFixture):
+    """Test that all accounts are tested and that a failure doesn't prevent testing the others."""
+    account_manager.storage.add_account(
+        SAMPLE_ACCOUNT.model_copy(update={"name": "other_account", "email": "other@example.com"})
+    )
+
+    def login(email: str, _password: str) -> tuple[str, list[bytes]]:
+        if email == "other@example.com":
+            raise IMAP4.error("Invalid credentials")
+        return "OK", [b"Login successful"]
+
+    mocker.patch("relay.providers.imap.IMAP4_SSL").return_value.login.side_effect = login
+
+    results = account_manager.test_all_accounts()
+    assert list(results) == [SAMPLE_ACCOUNT.name, "other_account"]
+    assert results[SAMPLE_ACCOUNT.name] is True
+    assert isinstance(results["other_account"], AuthenticationError)
+
+
+def test_test_all_accounts_connection_error(account_manager: AccountManager, mocker: MockerFixture):
+    """Test that a socket-level failure of one account doesn't prevent testing the others."""
+    account_manager.storage.add_account(
+        SAMPLE_ACCOUNT.model_copy(
+            update={"name": "other_account", "email": "other@example.com", "imap_server": "down.example.com"}
+        )
+    )
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    imap_instance = mock_imap_ssl.return_value
+    imap_instance.login.return_value = ("OK", [b"Login successful"])
+
+    def connect(host: str, _port: int) -> object:
+        if host == "down.example.com":
+            raise ConnectionRefusedError("Connection refused")
+        return imap_instance
+
+    mock_imap_ssl.side_effect = connect
+
+    results = account_manager.test_all_accounts()
+    assert results[SAMPLE_ACCOUNT.name] is True
+    assert isinstance(results["other_account"], ConnectionRefusedError)
@@ -0,0 +1,138 @@
+# Copyright (C) 2025, Relay.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
+
+"""Tests for the message cache."""
+
+import time
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from relay.auth.cache import MAX_CACHE_AGE, MessageCache
+from relay.models.message import MessageSummary
+
+SUMMARIES = {
+    uid: MessageSummary(uid=uid, subject=f"Subject {uid}", sender="sender@example.com", snippet="Hello")
+    for uid in ("3", "10")
+}
+MESSAGE = {
+    "uid": "10",
+    "subject": "Subject 10",
+    "headers": {"From": "sender@example.com"},
+    "body": {"text_plain": "Hi"},
+}
+
+
+def test_load_missing_cache(config_dir: Path):
+    """Test that a missing cache loads as empty."""
+    assert MessageCache(config_dir).load("test_account", "42") == {}
+
+
+def test_save_and_load(config_dir: Path):
+    """Test that saved summaries are loaded back for the same UIDVALIDITY only."""
+    cache = MessageCache(config_dir)
+    cache.save("test_account", "42", SUMMARIES)
+
+    assert cache.load("test_account", "42") == SUMMARIES
+    assert cache.load("test_account", "43") == {}
+    assert cache.load("other_account", "42") == {}
+    assert (cache.cache_dir / "test_account.enc").stat().st_mode & 0o777 == 0o600
+
+
+def test_cache_is_encrypted(config_dir: Path):
+    """Test that the cached summaries and messages aren't stored in plain text."""
+    cache = MessageCache(config_dir)
+    cache.save("test_account", "42", SUMMARIES)
+    cache.save_message("test_account", "42", MESSAGE)
+
+    for file in (cache.cache_dir / "test_account.enc", cache.cache_dir / "test_account" / "10.enc"):
+        assert b"Subject 10" not in file.read_bytes()
+
+
+def test_expired_cache(config_dir: Path, mocker: MockerFixture):
+    """Test that cached data older than the maximum age is discarded."""
+    cache = MessageCache(config_dir)
+    cache.save("test_account", "42", SUMMARIES)
+    cache.save_message("test_account", "42", MESSAGE)
+
+    mocker.patch("cryptography.fernet.time.time", return_value=time.time() + MAX_CACHE_AGE + 60)
+    assert cache.load("test_account", "42") == {}
+    assert cache.load_message("test_account", "42", "10") is None
+    assert not (cache.cache_dir / "test_account.enc").exists()
+
+
+def test_save_keeps_latest_uids(config_dir: Path, mocker: MockerFixture):
+    """Test that only the most recent UIDs are kept."""
+    mocker.patch("relay.auth.cache.MAX_CACHED_SUMMARIES", 1)
+    cache = MessageCache(config_dir)
+    cache.save("test_account", "42", SUMMARIES)
+
+    assert list(cache.load("test_account", "42")) == ["10"]
+
+
+def test_clear(config_dir: Path):
+    """Test that clearing the cache of an account removes its data."""
+    cache = MessageCache(config_dir)
+    cache.save("test_account", "42", SUMMARIES)
+    cache.clear("test_account")
+    cache.clear("test_account")
+
+    assert cache.load("test_account", "42") == {}
+
+
+def test_save_and_load_message(config_dir: Path):
+    """Test that saved messages are loaded back for the same UIDVALIDITY only."""
+    cache = MessageCache(config_dir)
+    assert cache.load_message("test_account", "42", "10") is None
+    cache.save_message("test_account", "42", MESSAGE)
+
+    assert cache.load_message("test_account", "42", "10") == MESSAGE
+    assert cache.load_message("test_account", "43", "10") is None
+    assert cache.load_message("test_account", "42", "3") is None
+
+    cache.discard_message("test_account", "10")
+    assert cache.load_message("test_account", "42", "10") is None
+
+
+def test_save_message_evicts_oldest_uids(config_dir: Path, mocker: MockerFixture):
+    """Test that only the most recent messages are kept."""
+    mocker.patch("relay.auth.cache.MAX_CACHED_MESSAGES", 1)
+    cache = MessageCache(config_dir)
+    cache.save_message("test_account", "42", {**MESSAGE, "uid": "9"})
+    cache.save_message("test_account", "42", MESSAGE)
+
+    assert cache.load_message("test_account", "42", "9") is None
+    assert cache.load_message("test_account", "42", "10") == MESSAGE
+
+
+def test_message_uid_traversal(config_dir: Path):
+    """Test that UIDs which aren't numbers never reach the file system."""
+    cache = MessageCache(config_dir)
+    cache.save_message("test_account", "42", MESSAGE)
+    victim = config_dir / "victim.enc"
+    victim.write_bytes(b"not a cache entry")
+
+    assert cache.load_message("test_account", "42", "../../victim") is None
+    cache.discard_message("test_account", "../../victim")
+    cache.save_message("test_account", "42", {**MESSAGE, "uid": "../../victim"})
+    assert victim.read_bytes() == b"not a cache entry"
+
+
+def test_clear_messages(config_dir: Path):
+    """Test that clearing the cache of an account also removes its messages."""
+    cache = MessageCache(config_dir)
+    cache.save_message("test_account", "42", MESSAGE)
+    cache.clear("test_account")
+
+    assert cache.load_message("test_account", "42", "10") is None
+
+
+def test_load_corrupted_cache(config_dir: Path):
+    """Test that a corrupted cache is ignored."""
+    cache = MessageCache(config_dir)
+    cache.cache_dir.mkdir()
+    (cache.cache_dir / "test_account.enc").write_text("{not json", encoding="utf-8")
+
+    assert cache.load("test_account", "42") == {}
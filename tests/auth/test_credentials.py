@@ -5,6 +5,8 @@
 
 """Tests for credential management."""
 
+from pathlib import Path
+
 import pytest
 
 from relay.auth.credentials import CredentialManager
@@ -28,6 +30,16 @@ def test_password_encryption_decryption(credential_manager: CredentialManager):
     assert decrypted_password == password
 
 
+def test_decrypt_passwords(credential_manager: CredentialManager):
+    """Test decrypting several passwords at once."""
+    passwords = ["first_password", "second_password"]
+    encrypted_passwords = [credential_manager.encrypt_password(password) for password in passwords]
+    assert credential_manager.decrypt_passwords(encrypted_passwords) == passwords
+
+    with pytest.raises(StorageError):
+        credential_manager.decrypt_passwords([*encrypted_passwords, b"invalid-token"])
+
+
 def test_decrypt_invalid_token_raises_error(credential_manager: CredentialManager):
     """Test that decrypting an invalid token raises a StorageError."""
     with pytest.raises(StorageError):
@@ -47,3 +59,13 @@ def test_reset(credential_manager: CredentialManager):
     assert credential_manager.key_file.exists()
     credential_manager.reset()
     assert not credential_manager.key_file.exists()
+
+
+def test_fernet_shared_across_managers(config_dir: Path):
+    """Test that managers of the same key file share the Fernet instance until the key changes."""
+    first, second = CredentialManager(config_dir), CredentialManager(config_dir)
+    fernet = first._get_fernet()
+    assert second._get_fernet() is fernet
+
+    first.reset()
+    assert second._get_fernet() is not fernet
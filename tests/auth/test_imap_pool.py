@@ -0,0 +1,93 @@
+# Copyright (C) 2025, Relay.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
+
+"""Tests for the IMAP session pool."""
+
+import threading
+
+from pytest_mock import MockerFixture
+
+from relay.auth.imap_pool import IMAPPool
+
+KEY = ("imap.example.com", "test@example.com")
+
+
+def test_get_reuses_live_client(mocker: MockerFixture):
+    """Test that a live client is returned without connecting again."""
+    client = mocker.Mock()
+    client.is_alive.return_value = True
+    connect = mocker.Mock(return_value=client)
+
+    pool = IMAPPool()
+    assert pool.get(KEY, connect) is client
+    assert pool.get(KEY, connect) is client
+    connect.assert_called_once()
+
+
+def test_get_replaces_idle_client(mocker: MockerFixture):
+    """Test that a client idle for too long is logged out and replaced."""
+    old_client, new_client = mocker.Mock(), mocker.Mock()
+    connect = mocker.Mock(side_effect=[old_client, new_client])
+    mocker.patch("relay.auth.imap_pool.time.monotonic", side_effect=[0.0, 100.0, 100.0])
+
+    pool = IMAPPool(idle_timeout=60)
+    pool.get(KEY, connect)
+    assert pool.get(KEY, connect) is new_client
+    old_client.logout.assert_called_once()
+    old_client.is_alive.assert_not_called()
+
+
+def test_slow_connect_doesnt_block_other_keys(mocker: MockerFixture):
+    """Test that connecting one account doesn't hold the pool for the others."""
+    connecting, release = threading.Event(), threading.Event()
+    slow_client, fast_client = mocker.Mock(), mocker.Mock()
+
+    def slow_connect():
+        connecting.set()
+        release.wait(5)
+        return slow_client
+
+    pool = IMAPPool()
+    thread = threading.Thread(target=pool.get, args=(KEY, slow_connect))
+    thread.start()
+    assert connecting.wait(5)
+    # The other key is served while the first connection is still pending
+    assert pool.get(("imap.example.com", "other@example.com"), lambda: fast_client) is fast_client
+    release.set()
+    thread.join(5)
+
+    assert pool.get(KEY, mocker.Mock()) is slow_client
+
+
+def test_concurrent_connect_keeps_first_client(mocker: MockerFixture):
+    """Test that a client connected concurrently for the same key is logged out instead of leaking."""
+    first_client, second_client = mocker.Mock(), mocker.Mock()
+    pool = IMAPPool()
+
+    def connect():
+        # Another thread pools its client while this one is connecting
+        pool.get(KEY, lambda: first_client)
+        return second_client
+
+    assert pool.get(KEY, connect) is first_client
+    second_client.logout.assert_called_once()
+    first_client.logout.assert_not_called()
+
+
+def test_close_all(mocker: MockerFixture):
+    """Test that closing the pool logs out every session, even dropped ones."""
+    clients = [mocker.Mock(), mocker.Mock()]
+    clients[0].logout.side_effect = OSError("socket closed")
+
+    pool = IMAPPool()
+    pool.get(KEY, lambda: clients[0])
+    pool.get(("imap.example.com", "other@example.com"), lambda: clients[1])
+    pool.close_all()
+
+    for client in clients:
+        client.logout.assert_called_once()
+    connect = mocker.Mock()
+    pool.get(KEY, connect)
+    connect.assert_called_once()
@@ -5,7 +5,12 @@
 
 """Tests for account storage."""
 
+import json
+from base64 import b64encode
+from pathlib import Path
+
 import pytest
+from pytest_mock import MockerFixture
 
 from relay.auth.storage import AccountStorage
 from relay.exceptions import AccountExistsError, AccountNotFoundError
@@ -52,6 +57,59 @@ def test_get_nonexistent_account_raises_error(account_storage: AccountStorage):
         account_storage.get_account("nonexistent")
 
 
+def test_get_default_account(account_storage: AccountStorage):
+    """Test retrieving the first configured account."""
+    assert account_storage.get_default_account() is None
+    account_storage.add_account(SAMPLE_ACCOUNT)
+    account = account_storage.get_default_account()
+    assert account is not None
+    assert account.name == SAMPLE_ACCOUNT.name
+
+
+def test_accounts_file_parsed_once(account_storage: AccountStorage, mocker: MockerFixture):
+    """Test that the accounts file is only parsed again once modified by another writer."""
+    json_load = mocker.spy(json, "loads")
+    account_storage.add_account(SAMPLE_ACCOUNT)
+    account_storage.get_account(SAMPLE_ACCOUNT.name)
+    account_storage.list_accounts()
+    assert json_load.call_count == 0
+
+    # Written by another process
+    AccountStorage(account_storage.config_dir).remove_account(SAMPLE_ACCOUNT.name)
+    json_load.reset_mock()
+    assert account_storage.list_accounts() == []
+    assert json_load.call_count == 1
+
+
+def test_load_legacy_encoded_passwords(account_storage: AccountStorage):
+    """Test that passwords stored with an extra base64 layer by older versions are still readable."""
+    account_storage.add_account(SAMPLE_ACCOUNT)
+    data = json.loads(account_storage.accounts_file.read_text())
+    token = data[SAMPLE_ACCOUNT.name]["encrypted_password"]
+    assert token.startswith("gAAA")
+
+    data[SAMPLE_ACCOUNT.name]["encrypted_password"] = b64encode(token.encode()).decode()
+    account_storage.accounts_file.write_text(json.dumps(data))
+    legacy_storage = AccountStorage(account_storage.config_dir)
+    assert legacy_storage.get_account_password(SAMPLE_ACCOUNT.name) == SAMPLE_ACCOUNT.password
+
+
+def test_save_accounts_data(account_storage: AccountStorage, mocker: MockerFixture):
+    """Test that the accounts file is replaced atomically, and not rewritten when unchanged."""
+    account_storage.add_account(SAMPLE_ACCOUNT)
+    assert account_storage.accounts_file.stat().st_mode & 0o777 == 0o600
+    assert list(account_storage.config_dir.glob("*.tmp")) == []
+
+    write_bytes = mocker.spy(Path, "write_bytes")
+    account_storage._save_accounts_data(account_storage._load_accounts_data())
+    write_bytes.assert_not_called()
+
+    # Modified by another process
+    AccountStorage(account_storage.config_dir).remove_account(SAMPLE_ACCOUNT.name)
+    account_storage.add_account(SAMPLE_ACCOUNT)
+    assert write_bytes.call_count == 2
+
+
 def test_list_accounts(account_storage: AccountStorage):
     """Test listing accounts."""
     assert account_storage.list_accounts() == []
@@ -62,6 +120,10 @@ def test_list_accounts(account_storage: AccountStorage):
     # Ensure password is not in the listed info
     assert not hasattr(accounts_list[0], "encrypted_password")
     assert not hasattr(accounts_list[0], "password")
+    # Read back from the file
+    reloaded_info = AccountStorage(account_storage.config_dir).list_accounts()[0]
+    assert reloaded_info == accounts_list[0]
+    assert reloaded_info.provider is SAMPLE_ACCOUNT.provider
 
 
 def test_remove_account(account_storage: AccountStorage):
@@ -85,6 +147,21 @@ def test_get_account_password(account_storage: AccountStorage):
     assert password == SAMPLE_ACCOUNT.password
 
 
+def test_get_accounts_with_passwords(account_storage: AccountStorage):
+    """Test retrieving several accounts along with their decrypted password."""
+    assert account_storage.get_accounts_with_passwords() == {}
+    account_storage.add_account(SAMPLE_ACCOUNT)
+
+    accounts = account_storage.get_accounts_with_passwords()
+    assert list(accounts) == [SAMPLE_ACCOUNT.name]
+    account, password = accounts[SAMPLE_ACCOUNT.name]
+    assert account.email == SAMPLE_ACCOUNT.email
+    assert password == SAMPLE_ACCOUNT.password
+
+    with pytest.raises(AccountNotFoundError):
+        account_storage.get_accounts_with_passwords([SAMPLE_ACCOUNT.name, "nonexistent"])
+
+
 def test_reset_storage(account_storage: AccountStorage):
     """Test resetting the entire storage."""
     account_storage.add_account(SAMPLE_ACCOUNT)
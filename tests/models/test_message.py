@@ -0,0 +1,34 @@
+# Copyright (C) 2025, Relay.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
+
+"""Tests for message models."""
+
+import pytest
+
+from relay.models.message import SNIPPET_LENGTH, MessageSummary
+
+
+@pytest.mark.parametrize(
+    ("from_header", "expected_sender"),
+    [
+        ('"John Doe" <john@example.com>', "john@example.com"),
+        ("john@example.com", "john@example.com"),
+        ("John Doe", "John Doe"),
+        ("", ""),
+    ],
+)
+def test_summary_sender(from_header: str, expected_sender: str):
+    """Test that the sender address is extracted, keeping the raw header when it has no address."""
+    summary = MessageSummary.from_message_data({"uid": "1", "headers": {"From": from_header}})
+    assert summary.sender == expected_sender
+
+
+def test_summary_snippet():
+    """Test that snippets skip leading whitespace and join lines."""
+    summary = MessageSummary.from_message_data({"uid": "1", "body": {"text_plain": "\r\n  Hello\r\nworld"}})
+    assert summary.snippet == "Hello world"
+
+    summary = MessageSummary.from_message_data({"uid": "1", "body": {"text_plain": "\n" * 50 + "a" * 500}})
+    assert summary.snippet == "a" * SNIPPET_LENGTH + "..."
@@ -18,8 +18,11 @@ from relay.models.account import EmailProvider
 from relay.providers.imap import (
     IMAPClient,
     clear_quoted_body,
+    compress_uids,
     parse_email_parts,
+    parse_fetch_response,
     parse_html_body,
+    resolve_subject,
     resolve_thread_id,
 )
 
@@ -177,6 +180,278 @@ def test_list_email_uids_unseen_only(mocker: MockerFixture):
     assert uids == ["4", "5"]
 
 
+def test_list_latest_uids(mocker: MockerFixture):
+    """Test listing the latest UIDs along with the UIDVALIDITY of the folder."""
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+
+    mock_imap_instance.login.return_value = ("OK", [b"Login successful"])
+    mock_imap_instance.select.return_value = ("OK", [b"10"])
+    mock_imap_instance.response.return_value = ("UIDVALIDITY", [b"42"])
+    mock_imap_instance.fetch.return_value = ("OK", [b"10 (UID 42)", b"9 (UID 41)"])
+
+    client = IMAPClient("user@gmail.com", "password")
+    assert client.list_latest_uids(2) == ("42", ["42", "41"], 10)
+    mock_imap_instance.fetch.assert_called_once_with("9:10", "(UID)")
+
+    mock_imap_instance.uid.return_value = ("OK", [b"3 7 41"])
+    assert client.list_latest_uids(2, unseen_only=True) == ("42", ["41", "7"], 3)
+    mock_imap_instance.uid.assert_called_once_with("SEARCH", None, "UNSEEN")
+
+
+def test_get_uid_validity(mocker: MockerFixture):
+    """Test reading the UIDVALIDITY of a folder through STATUS."""
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+
+    mock_imap_instance.login.return_value = ("OK", [b"Login successful"])
+    mock_imap_instance.status.return_value = ("OK", [b"INBOX (UIDVALIDITY 42)"])
+
+    client = IMAPClient("user@gmail.com", "password")
+    assert client.get_uid_validity() == "42"
+    mock_imap_instance.status.assert_called_once_with("INBOX", "(UIDVALIDITY)")
+    mock_imap_instance.select.assert_not_called()
+
+    mock_imap_instance.status.return_value = ("NO", [b"Unknown folder"])
+    assert not client.get_uid_validity()
+
+
+@pytest.mark.parametrize(
+    ("login_capabilities", "capabilities", "expected_commands"),
+    [
+        (b"IMAP4rev1 MOVE", None, ["MOVE"]),
+        (b"IMAP4rev1", None, ["COPY", "STORE"]),
+        (None, b"IMAP4rev1 MOVE", ["MOVE"]),
+        (None, b"IMAP4rev1", ["COPY", "STORE"]),
+    ],
+)
+def test_move_to_trash(
+    mocker: MockerFixture, login_capabilities: bytes | None, capabilities: bytes | None, expected_commands: list[str]
+):
+    """Test moving a message with MOVE when supported, and COPY + STORE + EXPUNGE otherwise."""
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+
+    # Pending untagged responses, which imaplib discards on SELECT
+    untagged: dict[str, list] = {}
+
+    def login(*_):
+        if login_capabilities is not None:
+            untagged["CAPABILITY"] = [login_capabilities]
+        return "OK", [b"Login successful"]
+
+    def select(*_, **__):
+        untagged.clear()
+        return "OK", [b"10"]
+
+    mock_imap_instance.login.side_effect = login
+    mock_imap_instance.select.side_effect = select
+    mock_imap_instance.response.side_effect = lambda code: (code, untagged.pop(code, [None]))
+    mock_imap_instance.capability.return_value = ("OK", [capabilities])
+    mock_imap_instance.uid.return_value = ("OK", [b""])
+    mock_imap_instance.expunge.return_value = ("OK", [b""])
+
+    client = IMAPClient("user@gmail.com", "password")
+    client.move_to_trash("42")
+    client.mark_as_spam("43")
+
+    commands = [call.args[0] for call in mock_imap_instance.uid.call_args_list]
+    assert commands == expected_commands * 2
+    assert mock_imap_instance.uid.call_args_list[0].args[1:3] == ("42", "[Gmail]/Trash")
+    assert mock_imap_instance.expunge.call_count == (0 if "MOVE" in expected_commands else 2)
+    # The capabilities are only requested when the server didn't advertise them at login, and only once
+    assert mock_imap_instance.capability.call_count == (0 if login_capabilities else 1)
+
+
+def test_search_email_uids(mocker: MockerFixture):
+    """Test searching email UIDs on the server."""
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+
+    mock_imap_instance.login.return_value = ("OK", [b"Login successful"])
+    mock_imap_instance.select.return_value = ("OK", [b"123"])
+    mock_imap_instance.uid.return_value = ("OK", [b"2 5"])
+    mock_imap_instance.close.return_value = ("OK", [b""])
+
+    client = IMAPClient("user@gmail.com", "password")
+    uids = client.search_email_uids('say "hi"')
+
+    mock_imap_instance.uid.assert_called_once_with(
+        "SEARCH", None, 'OR OR SUBJECT "say \\"hi\\"" FROM "say \\"hi\\"" BODY "say \\"hi\\""'
+    )
+    assert uids == ["2", "5"]
+
+    mock_imap_instance.uid.reset_mock()
+    client.search_email_uids("hi", unseen_only=True)
+    mock_imap_instance.uid.assert_called_once_with("SEARCH", None, 'UNSEEN OR OR SUBJECT "hi" FROM "hi" BODY "hi"')
+
+    with pytest.raises(ValueError, match="ASCII"):
+        client.search_email_uids("café")
+
+    mock_imap_instance.uid.reset_mock()
+    for query in ("hi\r\nA1 LOGOUT", "hi\nthere"):
+        with pytest.raises(ValueError, match="line breaks"):
+            client.search_email_uids(query)
+    mock_imap_instance.uid.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("uids", "expected"),
+    [
+        (["5"], "5"),
+        (["3", "4", "5", "9"], "3:5,9"),
+        (["12", "10", "11", "1", "11"], "1,10:12"),
+        ([], ""),
+    ],
+)
+def test_compress_uids(uids: list[str], expected: str):
+    """Test that consecutive UIDs are collapsed into ranges."""
+    assert compress_uids(uids) == expected
+
+
+def test_parse_fetch_response():
+    """Test grouping FETCH response literals by UID."""
+    content = [
+        (b"2 (UID 12 BODY[HEADER] {5}", b"head2"),
+        (b" BODY[TEXT] {5}", b"text2"),
+        b")",
+        (b"1 (BODY[] {5}", b"body1"),
+        b" UID 11 FLAGS (\\Seen))",
+    ]
+    assert parse_fetch_response(content) == {"12": [b"head2", b"text2"], "11": [b"body1"]}
+    assert parse_fetch_response([None]) == {}
+
+
+def test_fetch_messages_follows_requested_order(mocker: MockerFixture, simple_email: EmailMessage):
+    """Test that fetched messages are matched to their UID regardless of the server order."""
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+
+    mock_imap_instance.login.return_value = ("OK", [b"Login successful"])
+    mock_imap_instance.select.return_value = ("OK", [b"123"])
+    raw_email = simple_email.as_bytes()
+    mock_imap_instance.uid.return_value = (
+        "OK",
+        [(b"1 (UID 3 BODY[] {1})", raw_email), b")", (b"2 (UID 7 BODY[] {1})", raw_email), b")"],
+    )
+
+    client = IMAPClient("user@gmail.com", "password")
+    messages = client.fetch_messages(["7", "3", "9"])
+
+    mock_imap_instance.uid.assert_called_once_with("FETCH", "3,7,9", "(BODY.PEEK[])")
+    assert [msg["uid"] for msg in messages] == ["7", "3"]
+    assert messages[0]["subject"] == "Simple Email"
+
+
+def test_fetch_messages_in_batches(mocker: MockerFixture, simple_email: EmailMessage):
+    """Test that large UID sets are fetched over several FETCH commands."""
+    mocker.patch("relay.providers.imap.FETCH_BATCH_SIZE", 2)
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+
+    mock_imap_instance.login.return_value = ("OK", [b"Login successful"])
+    mock_imap_instance.select.return_value = ("OK", [b"123"])
+    raw_email = simple_email.as_bytes()
+    mock_imap_instance.uid.side_effect = [
+        ("OK", [(b"1 (UID 1 BODY[] {1})", raw_email), b")", (b"2 (UID 2 BODY[] {1})", raw_email), b")"]),
+        ("OK", [(b"3 (UID 3 BODY[] {1})", raw_email), b")"]),
+    ]
+
+    client = IMAPClient("user@gmail.com", "password")
+    messages = client.fetch_messages(["1", "2", "3"])
+
+    assert [call.args[1] for call in mock_imap_instance.uid.call_args_list] == ["1:2", "3"]
+    assert [msg["uid"] for msg in messages] == ["1", "2", "3"]
+
+
+def test_fetch_summaries(mocker: MockerFixture, simple_email: EmailMessage):
+    """Test that summaries are built from the header and a body preview only."""
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+
+    mock_imap_instance.login.return_value = ("OK", [b"Login successful"])
+    mock_imap_instance.select.return_value = ("OK", [b"123"])
+    header, body = simple_email.as_bytes().split(b"\n\n", 1)
+    mock_imap_instance.uid.return_value = (
+        "OK",
+        [(b"1 (UID 3 BODY[HEADER] {1}", header + b"\n\n"), (b" BODY[TEXT]<0> {1}", body), b")"],
+    )
+
+    client = IMAPClient("user@gmail.com", "password")
+    summaries = client.fetch_summaries(["3", "9"], preview_size=512)
+
+    mock_imap_instance.uid.assert_called_once_with("FETCH", "3,9", "(BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.512>)")
+    assert len(summaries) == 1
+    assert summaries[0].uid == "3"
+    assert summaries[0].subject == "Simple Email"
+    assert summaries[0].sender == "sender@example.com"
+    assert summaries[0].snippet.startswith("This is the body")
+
+
+def test_fetch_summaries_snippet_matches_body(mocker: MockerFixture):
+    """Test that snippets use the same plain text body as full messages, without the quoted reply."""
+    reply = EmailMessage()
+    reply["From"] = "sender@example.com"
+    reply["Subject"] = "Re: Plans"
+    reply["Date"] = "Tue, 15 Nov 2023 09:26:03 +0000"
+    reply.set_content("Sounds good.\n\nOn Mon, John Doe <john@example.com> wrote:\n> Shall we meet?")
+    multipart = EmailMessage()
+    multipart["From"] = "sender@example.com"
+    multipart["Subject"] = "Parts"
+    multipart["Date"] = "Wed, 16 Nov 2023 10:00:00 +0000"
+    multipart.set_content("First part.")
+    multipart.make_mixed()
+    last_part = EmailMessage()
+    last_part.set_content("Last part.")
+    multipart.attach(last_part)
+
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+    mock_imap_instance.login.return_value = ("OK", [b"Login successful"])
+    mock_imap_instance.select.return_value = ("OK", [b"123"])
+    content = []
+    for idx, msg in enumerate((reply, multipart), 1):
+        header, body = msg.as_bytes().split(b"\n\n", 1)
+        content += [(f"{idx} (UID {idx} BODY[HEADER] {{1}}".encode(), header + b"\n\n"), (b" BODY[TEXT]<0> {1}", body)]
+        content.append(b")")
+    mock_imap_instance.uid.return_value = ("OK", content)
+
+    client = IMAPClient("user@gmail.com", "password")
+    summaries = client.fetch_summaries(["1", "2"])
+
+    assert summaries[0].snippet == "Sounds good."
+    assert summaries[1].snippet == "Last part."
+    for summary, msg in zip(summaries, (reply, multipart), strict=True):
+        assert summary.snippet == parse_email_parts(msg)["text_plain"].strip()
+
+
+def test_fetch_summaries_truncated_base64(mocker: MockerFixture):
+    """Test that a body preview cut in the middle of a base64 group still gets decoded."""
+    msg = EmailMessage()
+    msg["From"] = "sender@example.com"
+    msg["Subject"] = "Привет"
+    msg["Date"] = "Tue, 15 Nov 2023 09:26:03 +0000"
+    msg.set_content("Привет мир " * 300)
+    header, body = msg.as_bytes().split(b"\n\n", 1)
+    assert msg["Content-Transfer-Encoding"] == "base64"
+    # Cut so that the base64 data without line breaks has a length of 1 (mod 4)
+    preview = next(body[:cut] for cut in range(2048, 2052) if len(b"".join(body[:cut].split())) % 4 == 1)
+
+    mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
+    mock_imap_instance = mock_imap_ssl.return_value
+    mock_imap_instance.login.return_value = ("OK", [b"Login successful"])
+    mock_imap_instance.select.return_value = ("OK", [b"123"])
+    mock_imap_instance.uid.return_value = (
+        "OK",
+        [(b"1 (UID 3 BODY[HEADER] {1}", header + b"\n\n"), (b" BODY[TEXT]<0> {1}", preview), b")"],
+    )
+
+    client = IMAPClient("user@gmail.com", "password")
+    summaries = client.fetch_summaries(["3"])
+
+    assert summaries[0].snippet.startswith("Привет мир Привет мир")
+
+
 def test_mark_as_read(mocker: MockerFixture):
     """Test marking email as read."""
     mock_imap_ssl = mocker.patch("relay.providers.imap.IMAP4_SSL")
@@ -215,6 +490,10 @@ def test_parse_email_parts_multipart(multipart_email: EmailMessage):
     assert attachment["content_type"] == "application/octet-stream"
     assert b64decode(attachment["content"]) == b"attachment content"
 
+    attachment = parse_email_parts(multipart_email, include_attachment_content=False)["attachments"][0]
+    assert attachment["content"] is None
+    assert attachment["size"] == len(b"attachment content")
+
 
 @pytest.mark.parametrize(
     ("email_headers", "expected_thread_id"),
@@ -239,6 +518,25 @@ def test_resolve_thread_id_parametrized(email_headers: dict[str, str], expected_
     assert resolve_thread_id(email_headers) == expected_thread_id
 
 
+@pytest.mark.parametrize(
+    ("email_headers", "expected_subject"),
+    [
+        ({"Subject": "Hello"}, "Hello"),
+        ({"Subject": "Re: Hello"}, "Hello"),
+        ({"Subject": "RE: Fwd: re:FW: Hello"}, "Hello"),
+        ({"Subject": "Hello Re: world"}, "Hello Re: world"),
+        ({"Subject": "Re: Hello", "Thread-Topic": "Topic"}, "Topic"),
+        ({}, ""),
+    ],
+)
+def test_resolve_subject_parametrized(email_headers: dict[str, str], expected_subject: str):
+    """Test resolve_subject with various subjects."""
+    message = EmailMessage()
+    for key, value in email_headers.items():
+        message[key] = value
+    assert resolve_subject(message) == expected_subject
+
+
 def test_parse_html_body():
     """Test parse_html_body."""
     html = "<h1>Title</h1><p>Some text with a <a href='#'>link</a>.</p>"
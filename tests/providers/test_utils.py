@@ -0,0 +1,30 @@
+# Copyright (C) 2025, Relay.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0> for full license details.
+
+"""Tests for provider utilities."""
+
+import pytest
+
+from relay.models.base import EmailProvider
+from relay.providers.utils import resolve_provider
+
+
+@pytest.mark.parametrize(
+    ("email_address", "expected_provider"),
+    [
+        ("user@gmail.com", EmailProvider.GMAIL),
+        ("user@GoogleMail.com", EmailProvider.GMAIL),
+        ("user@hotmail.fr", EmailProvider.OUTLOOK),
+        ("user@yahoo.co.uk", EmailProvider.YAHOO),
+        ("user@me.com", EmailProvider.ICLOUD),
+        ("user@mail.yahoo.com", EmailProvider.YAHOO),
+        ("user@gmail.com.", EmailProvider.GMAIL),
+        ("user@notgmail.com", None),
+        ("user@example.com", None),
+    ],
+)
+def test_resolve_provider(email_address: str, expected_provider: EmailProvider | None):
+    """Test provider resolution from the email domain."""
+    assert resolve_provider(email_address) == expected_provider